@@ -0,0 +1,200 @@
+"""
+Async Password Checker
+
+Native asyncio counterparts of pwned_api_check for ASGI services and other
+event-loop code, so checks don't have to be pushed onto a thread.
+
+Requests go through one pooled httpx.AsyncClient with keep-alive (and
+HTTP/2 when the 'h2' package is installed). The disk cache, memory cache,
+offline corpus and pre-filter configured in password_checker are honoured
+exactly as in the synchronous path.
+
+Requires httpx:
+    pip install httpx h2
+"""
+
+import asyncio
+import importlib.util
+import time
+
+from password_checker import (cached_range, cached_range_response,
+                              current_rate_limiter, group_by_prefix, handle_range_response,
+                              hash_password, lookup_local, offline_bucket,
+                              parse_range_response, range_url, record_coalesced,
+                              record_response, record_retry, remember_range)
+from rate_limiter import RETRY_STATUSES, parse_retry_after
+from singleflight import AsyncSingleflight
+
+DEFAULT_CONCURRENCY = 20
+
+
+class AsyncPasswordChecker:
+    def __init__(self, client=None, max_connections=100, timeout=10.0, limiter=None):
+        """
+        Async breach checker sharing one connection pool
+
+        Args:
+            client (httpx.AsyncClient): Client to use instead of creating one
+            max_connections (int): Connection pool size for a created client
+            timeout (float): Request timeout in seconds for a created client
+            limiter (AdaptiveRateLimiter): Rate limiter (defaults to the
+                process-wide one in password_checker)
+        """
+        import httpx
+
+        self.limiter = limiter
+        # Coroutines missing the cache for the same prefix share one fetch
+        self.flights = AsyncSingleflight(on_coalesce=record_coalesced)
+        self._retryable_errors = httpx.TransportError
+        self._owns_client = client is None
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=importlib.util.find_spec('h2') is not None,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections),
+            )
+        self.client = client
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def request_api_data(self, query_char):
+        """Fetch a range, going through the disk cache when it is enabled"""
+        cached, headers = cached_range_response(query_char)
+        if cached is not None:
+            return cached
+        limiter = self.limiter or current_rate_limiter()
+        attempt = 0
+        while True:
+            queued = time.perf_counter()
+            wait = limiter.reserve()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = limiter.reserve()
+            started = time.perf_counter()
+            try:
+                res = await self.client.get(range_url(query_char), headers=headers)
+            except self._retryable_errors as e:
+                if attempt >= limiter.max_retries:
+                    record_retry(type(e).__name__, 0, failed=True)
+                    raise
+                delay = limiter.backoff(attempt)
+                record_retry(type(e).__name__, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            record_response(res, started - queued, time.perf_counter() - started)
+            if res.status_code in RETRY_STATUSES and attempt < limiter.max_retries:
+                retry_after = parse_retry_after(res.headers.get('Retry-After'))
+                delay = limiter.on_throttle(attempt, retry_after)
+                record_retry(str(res.status_code), delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            if res.status_code in (200, 304):
+                limiter.on_success()
+            return handle_range_response(query_char, res)
+
+    async def get_range(self, first5_char):
+        """Return the parsed {tail: count} range for a prefix"""
+        bucket = offline_bucket(first5_char)
+        if bucket is not None:
+            return bucket
+        leaks = cached_range(first5_char)
+        if leaks is None:
+            leaks = await self.flights.do(first5_char, self.fetch_parsed_range, first5_char)
+        return leaks
+
+    async def fetch_parsed_range(self, first5_char):
+        leaks = parse_range_response(await self.request_api_data(first5_char))
+        remember_range(first5_char, leaks)
+        return leaks
+
+    async def pwned_api_check(self, password):
+        """Return how many times a password appears in breaches"""
+        sha1password = hash_password(password)
+        count = lookup_local(sha1password)
+        if count is not None:
+            return count
+        leaks = await self.get_range(sha1password[:5])
+        return leaks.get(sha1password[5:], 0)
+
+    async def check_many(self, passwords, concurrency=DEFAULT_CONCURRENCY):
+        """
+        Check passwords with at most `concurrency` range requests in flight
+
+        Passwords sharing a hash prefix are resolved from one request.
+        Results are yielded as they complete, not in input order.
+
+        Yields:
+            tuple: (password, breach count, exception or None)
+        """
+        passwords = list(passwords)
+        queue = asyncio.Queue()
+        for item in group_by_prefix(passwords).items():
+            queue.put_nowait(item)
+        results = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    first5_char, entries = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                local = [(index, lookup_local(first5_char + tail)) for index, tail in entries]
+                if all(count is not None for _, count in local):
+                    for index, count in local:
+                        await results.put((passwords[index], count, None))
+                    continue
+                try:
+                    leaks = await self.get_range(first5_char)
+                except Exception as e:
+                    for index, _ in entries:
+                        await results.put((passwords[index], None, e))
+                    continue
+                for index, tail in entries:
+                    await results.put((passwords[index], leaks.get(tail, 0), None))
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+        remaining = len(passwords)
+        try:
+            while remaining:
+                yield await results.get()
+                remaining -= 1
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+_default_checkers = {}
+
+
+def _default_checker():
+    # One pooled client per event loop; clients can't be shared across loops
+    loop = asyncio.get_event_loop()
+    checker = _default_checkers.get(loop)
+    if checker is None:
+        for stale in [other for other in _default_checkers if other.is_closed()]:
+            del _default_checkers[stale]
+        checker = _default_checkers[loop] = AsyncPasswordChecker()
+    return checker
+
+
+async def pwned_api_check_async(password):
+    """Async pwned_api_check using a shared pooled client"""
+    return await _default_checker().pwned_api_check(password)
+
+
+async def check_many(passwords, concurrency=DEFAULT_CONCURRENCY):
+    """Async generator of (password, count, error) using a shared pooled client"""
+    async for result in _default_checker().check_many(passwords, concurrency):
+        yield result
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Fake Range Server
+
+A local stand-in for api.pwnedpasswords.com that serves /range/{prefix}
+from a synthetic, deterministic corpus, so performance can be measured
+without touching the real service.
+
+Every range holds pseudo-random suffixes derived from the seed plus the
+real hashes of a few well-known passwords (see KNOWN_PASSWORDS), so those
+are reported as breached. ?mode=ntlm serves NTLM ranges the same way (see
+KNOWN_NTLM). Latency, jitter, 429 injection and response
+padding are configurable, and ETag / If-None-Match are honoured.
+
+Usage:
+    python benchmarks/fake_range_server.py --port 8000 --latency 0.02
+    PWNED_API_URL=http://127.0.0.1:8000/range/ python password_checker.py password
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KNOWN_PASSWORDS = {
+    'password': 9545824,
+    'password123': 2390282,
+    '123456': 37359195,
+    'qwerty': 3912816,
+    'admin': 40062,
+    'letmein': 254287,
+    'welcome123': 27523,
+}
+# NTLM hashes of some of the passwords above (hashlib often lacks MD4)
+KNOWN_NTLM = {
+    '8846F7EAEE8FB117AD06BDD830B7586C': 9545824,  # password
+    '32ED87BDB5FDC5E9CBA88547376818D4': 37359195,  # 123456
+    '209C6174DA490CAEB422F3FA5A7AE634': 40062,  # admin
+}
+SUFFIX_LENGTHS = {'sha1': 35, 'ntlm': 27}
+DEFAULT_RANGE_SIZE = 800
+
+
+class FakeCorpus:
+    def __init__(self, seed=0, range_size=DEFAULT_RANGE_SIZE, known=None):
+        """
+        Deterministic synthetic breach corpus
+
+        Args:
+            seed (int): Changes every generated suffix
+            range_size (int): Average number of suffixes per range
+            known (dict): Passwords (and counts) guaranteed to be present
+        """
+        self.seed = seed
+        self.range_size = range_size
+        self.known = {'sha1': {}, 'ntlm': {}}
+        for password, count in (known if known is not None else KNOWN_PASSWORDS).items():
+            digest = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+            self.known['sha1'].setdefault(digest[:5], {})[digest[5:]] = count
+        for digest, count in KNOWN_NTLM.items():
+            self.known['ntlm'].setdefault(digest[:5], {})[digest[5:]] = count
+        self.body = lru_cache(maxsize=4096)(self._body)
+
+    def entries(self, prefix, mode='sha1'):
+        """Return sorted (suffix, count) pairs for a range"""
+        # SHA-1 ranges keep their original seeding so results stay comparable
+        key = prefix if mode == 'sha1' else f"{mode}:{prefix}"
+        rng = random.Random(f"{self.seed}:{key}")
+        size = max(1, int(self.range_size * rng.uniform(0.8, 1.2)))
+        entries = dict(self.known[mode].get(prefix, {}))
+        length = SUFFIX_LENGTHS[mode]
+        for i in range(size):
+            suffix = hashlib.sha1(f"{self.seed}:{key}:{i}".encode()).hexdigest().upper()
+            entries.setdefault(suffix[:length], rng.randint(1, 5000))
+        return sorted(entries.items())
+
+    def _body(self, prefix, pad_to=None, mode='sha1'):
+        lines = [f"{suffix}:{count}" for suffix, count in self.entries(prefix, mode)]
+        if pad_to and len(lines) < pad_to:
+            # Padding entries carry a zero count, like the real Add-Padding
+            rng = random.Random(f"pad:{self.seed}:{prefix if mode == 'sha1' else mode + ':' + prefix}")
+            length = SUFFIX_LENGTHS[mode]
+            lines.extend(f"{rng.getrandbits(length * 4):0{length}X}:0"
+                         for _ in range(pad_to - len(lines)))
+            lines.sort()
+        return '\r\n'.join(lines).encode('ascii')
+
+
+def make_handler(corpus, latency=0.0, jitter=0.0, error_rate=0.0, retry_after=1, pad_to=None):
+    class RangeHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; don't let Nagle delay the body
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=b'', headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            delay = latency + random.uniform(-jitter, jitter)
+            if delay > 0:
+                time.sleep(delay)
+
+            path, _, query = self.path.partition('?')
+            mode = 'ntlm' if 'mode=ntlm' in query.split('&') else 'sha1'
+            prefix = path.rsplit('/', 1)[-1].upper()
+            if not path.startswith('/range/') or len(prefix) != 5:
+                self._send(404, b'Not found')
+                return
+            try:
+                int(prefix, 16)
+            except ValueError:
+                self._send(400, b'The hash prefix was not in a valid format')
+                return
+
+            if error_rate and random.random() < error_rate:
+                self._send(429, b'Rate limit exceeded', {'Retry-After': str(retry_after)})
+                return
+
+            padded = pad_to if self.headers.get('Add-Padding', '').lower() == 'true' else None
+            body = corpus.body(prefix, padded, mode)
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, headers={'ETag': etag})
+                return
+            self._send(200, body, {'Content-Type': 'text/plain', 'ETag': etag})
+
+    return RangeHandler
+
+
+def start_server(host='127.0.0.1', port=0, seed=0, range_size=DEFAULT_RANGE_SIZE,
+                 latency=0.0, jitter=0.0, error_rate=0.0, retry_after=1, pad_to=1000):
+    """
+    Start the fake server on a background thread
+
+    Returns:
+        tuple: (server, base URL ending in '/range/')
+    """
+    corpus = FakeCorpus(seed=seed, range_size=range_size)
+    handler = make_handler(corpus, latency, jitter, error_rate, retry_after, pad_to)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/range/"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a synthetic Pwned Passwords range API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--range-size', type=int, default=DEFAULT_RANGE_SIZE,
+                        help="Average suffixes per range")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random +/- seconds of latency")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of requests answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After sent with 429s")
+    parser.add_argument('--pad-to', type=int, default=1000,
+                        help="Pad ranges to this many entries when Add-Padding is requested")
+    args = parser.parse_args(argv)
+
+    server, url = start_server(args.host, args.port, args.seed, args.range_size, args.latency,
+                               args.jitter, args.error_rate, args.retry_after, args.pad_to)
+    print(f"🧪 Fake range API listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
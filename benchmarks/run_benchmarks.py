@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+
+Measures single checks, batch checks and report generation against the
+local fake range server, and saves the numbers as JSON so runs can be
+compared to catch regressions.
+
+Each scenario reports throughput, p50/p99 latency where it applies, and
+peak traced Python memory. Memory is measured in a separate, untimed pass
+because tracemalloc slows the traced code down severalfold.
+
+The startup scenario times fresh `pwned check` processes answered from a
+warm disk cache, net of bare interpreter startup, and fails the run if
+they exceed STARTUP_BUDGET_MS or load the HTTP stack.
+
+The strength scenario times estimate_strength() on typical and very long
+passwords, and fails the run if any of them takes longer than
+STRENGTH_BUDGET_MS.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Add parent directory (and examples) to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'examples'))
+
+import password_checker
+from strength_estimator import estimate_strength
+from batch_password_checker import BatchPasswordChecker
+from fake_range_server import start_server
+
+# Throughput drops or latency rises beyond this fraction count as regressions
+REGRESSION_THRESHOLD = 0.10
+# Cold start of a cached `pwned check`, beyond the interpreter's own startup
+STARTUP_BUDGET_MS = 50
+# Slowest strength estimate allowed (median per password), long ones included
+STRENGTH_BUDGET_MS = 1.0
+# Modules that must not be imported when no range has to be fetched
+HTTP_MODULES = ('requests', 'urllib3', 'httpx')
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def sample_passwords(count, seed=0):
+    """Deterministic mix of unique and known-breached passwords"""
+    known = ['password', 'password123', '123456', 'qwerty', 'admin']
+    return [known[i % len(known)] if i % 10 == 0 else f"bench-{seed}-{i}" for i in range(count)]
+
+
+def reset_backends():
+    password_checker.enable_memory_cache(None)
+    password_checker.enable_disk_cache(None)
+    password_checker.use_offline_corpus(None)
+    password_checker.use_prefilter(None)
+    password_checker.use_rate_limiter(None)
+
+
+@contextlib.contextmanager
+def measured(result):
+    """Record wall time of the block into result"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        result['seconds'] = time.perf_counter() - started
+
+
+def peak_memory(fn, *args):
+    """Peak traced memory of fn(*args), run again outside any timing"""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def check_each(passwords):
+    latencies = []
+    for password in passwords:
+        started = time.perf_counter()
+        password_checker.pwned_api_check(password)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def bench_single_checks(count):
+    passwords = sample_passwords(count, seed=1)
+    result = {'checks': count}
+    with measured(result):
+        latencies = check_each(passwords)
+    result['peak_memory_bytes'] = peak_memory(check_each, passwords)
+    result['checks_per_second'] = count / result['seconds']
+    result['p50_ms'] = percentile(latencies, 0.50) * 1000
+    result['p99_ms'] = percentile(latencies, 0.99) * 1000
+    result['mean_ms'] = statistics.mean(latencies) * 1000
+    return result
+
+
+def bench_batch(count, workers):
+    passwords = sample_passwords(count, seed=2)
+    checker = BatchPasswordChecker(workers=workers)
+    result = {'checks': count, 'workers': workers}
+    with measured(result):
+        results = checker.check_passwords_from_list(passwords, show_progress=False)
+    result['peak_memory_bytes'] = peak_memory(checker.check_passwords_from_list, passwords, False)
+    result['checks_per_second'] = count / result['seconds']
+    result['errors'] = sum(1 for r in results if r['status'] == 'ERROR')
+    return result, results
+
+
+def bench_report(results, repeat):
+    checker = BatchPasswordChecker()
+    timings = []
+    result = {'results': len(results), 'repeat': repeat}
+    with contextlib.redirect_stdout(io.StringIO()):
+        with measured(result):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                checker.generate_report(results)
+                timings.append(time.perf_counter() - started)
+        result['peak_memory_bytes'] = peak_memory(checker.generate_report, results)
+    result['p50_ms'] = percentile(timings, 0.50) * 1000
+    result['p99_ms'] = percentile(timings, 0.99) * 1000
+    return result
+
+
+def strength_passwords():
+    """Typical passwords plus long ones that stress matching and the guess arithmetic"""
+    path = os.path.join(ROOT, 'examples', 'test_passwords.txt')
+    with open(path, encoding='utf-8') as f:
+        passwords = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return passwords + ['aB3$' * 8, 'aB3$' * 25, 'Tr0ub4dour&3horse!battery9staple', 'a' * 500]
+
+
+def bench_strength(repeat):
+    passwords = strength_passwords()
+    per_password = [[] for _ in passwords]
+    result = {'passwords': len(passwords), 'repeat': repeat}
+    with measured(result):
+        for _ in range(repeat):
+            for password, timings in zip(passwords, per_password):
+                started = time.perf_counter()
+                estimate_strength(password, ['alice'])
+                timings.append(time.perf_counter() - started)
+    timings = [t for samples in per_password for t in samples]
+    result['p50_ms'] = percentile(timings, 0.50) * 1000
+    result['p99_ms'] = percentile(timings, 0.99) * 1000
+    # Median per password, so a GC pause does not count against one input
+    result['slowest_ms'] = max(statistics.median(samples) for samples in per_password) * 1000
+    result['budget_ms'] = STRENGTH_BUDGET_MS
+    return result
+
+
+def _run_python(argv, env):
+    # `pwned check` exits 1 for a breached password, 2 when a lookup fails
+    completed = subprocess.run([sys.executable] + argv, env=env, cwd=ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if completed.returncode not in (0, 1):
+        raise RuntimeError(f"{' '.join(argv)} failed: {completed.stderr.strip()}")
+
+
+def _startup_ms(argv, env, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _run_python(argv, env)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def _imported_modules(argv, env):
+    completed = subprocess.run([sys.executable, '-X', 'importtime'] + argv, env=env, cwd=ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return {line.rsplit('|', 1)[-1].strip() for line in completed.stderr.splitlines()
+            if line.startswith('import time:')}
+
+
+def bench_startup(url, repeat):
+    """Time fresh processes checking a password that is already in the disk cache"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PWNED_API_URL=url, PWNED_CACHE_PATH=os.path.join(tmp, 'ranges.sqlite'),
+                   PWNED_CACHE_TTL='inf')
+        check = ['pwned.py', 'check', '--quiet', 'password123']
+        # Warm the disk cache; every timed run below is answered from it
+        _run_python(check, env)
+        interpreter = _startup_ms(['-c', 'pass'], env, repeat)
+        result = {
+            'repeat': repeat,
+            'interpreter_ms': interpreter,
+            'import_ms': _startup_ms(['-c', 'import password_checker'], env, repeat) - interpreter,
+            'p50_ms': _startup_ms(check, env, repeat) - interpreter,
+            'budget_ms': STARTUP_BUDGET_MS,
+        }
+        imported = _imported_modules(check, env)
+    result['http_imported'] = sorted(name for name in HTTP_MODULES if name in imported)
+    return result
+
+
+def run(args):
+    server, url = start_server(latency=args.latency, jitter=args.jitter,
+                               error_rate=args.error_rate, retry_after=0)
+    password_checker.API_URL = url
+    try:
+        reset_backends()
+        scenarios = {'single_check': bench_single_checks(args.single)}
+
+        reset_backends()
+        batch, results = bench_batch(args.batch, workers=1)
+        scenarios['batch_sequential'] = batch
+
+        reset_backends()
+        scenarios['batch_parallel'], _ = bench_batch(args.batch, workers=args.workers)
+
+        scenarios['report'] = bench_report(results, args.report_repeat)
+
+        scenarios['strength'] = bench_strength(args.strength_repeat)
+
+        scenarios['startup'] = bench_startup(url, args.startup_repeat)
+    finally:
+        server.shutdown()
+
+    return {
+        'generated': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'error_rate': args.error_rate,
+            'single': args.single,
+            'batch': args.batch,
+            'workers': args.workers,
+        },
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'scenarios': scenarios,
+    }
+
+
+def compare(current, baseline):
+    """Print per-metric changes and return the number of regressions"""
+    regressions = 0
+    for name, metrics in current['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if not old:
+            continue
+        for key in ('checks_per_second', 'p50_ms', 'p99_ms'):
+            if key not in metrics or not old.get(key):
+                continue
+            change = (metrics[key] - old[key]) / old[key]
+            worse = change < -REGRESSION_THRESHOLD if key == 'checks_per_second' \
+                else change > REGRESSION_THRESHOLD
+            regressions += worse
+            flag = "🔴" if worse else "🟢"
+            print(f"{flag} {name}.{key}: {old[key]:.2f} -> {metrics[key]:.2f} ({change:+.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the password checker against a local fake API")
+    parser.add_argument('--output', default='bench_results.json', help="JSON file to write")
+    parser.add_argument('--compare', help="Earlier JSON results to compare against")
+    parser.add_argument('--single', type=int, default=200, help="Single checks to time")
+    parser.add_argument('--batch', type=int, default=2000, help="Passwords per batch run")
+    parser.add_argument('--workers', type=int, default=8, help="Workers for the parallel batch run")
+    parser.add_argument('--report-repeat', type=int, default=20)
+    parser.add_argument('--strength-repeat', type=int, default=20,
+                        help="Passes over the strength scenario's passwords")
+    parser.add_argument('--startup-repeat', type=int, default=20,
+                        help="Fresh processes to time for the startup scenario")
+    parser.add_argument('--latency', type=float, default=0.005, help="Fake API latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.002)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of 429 responses")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    for name, metrics in report['scenarios'].items():
+        summary = ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                            for k, v in metrics.items())
+        print(f"📈 {name}: {summary}")
+    print(f"\n📄 Results saved to: {args.output}")
+
+    status = 0
+    startup = report['scenarios']['startup']
+    if startup['p50_ms'] > STARTUP_BUDGET_MS:
+        print(f"🔴 Cached check startup {startup['p50_ms']:.1f} ms exceeds the {STARTUP_BUDGET_MS} ms budget")
+        status = 1
+    if startup['http_imported']:
+        print(f"🔴 Cached check imported {', '.join(startup['http_imported'])}")
+        status = 1
+    strength = report['scenarios']['strength']
+    if strength['slowest_ms'] > STRENGTH_BUDGET_MS:
+        print(f"🔴 Slowest strength estimate {strength['slowest_ms']:.2f} ms exceeds the "
+              f"{STRENGTH_BUDGET_MS} ms budget")
+        status = 1
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n🔁 Compared with {args.compare}:")
+        if compare(report, baseline):
+            return 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Breach Filter
+
+A compact blocked Bloom filter over breached password hashes, consulted
+before the exact lookup so most "not breached" answers never touch the
+API or the corpus.
+
+Each key sets k bits inside a single 64-byte block, so a query reads one
+cache line. SHA-1 (and NTLM) digests are already uniformly distributed,
+so the block and bit positions are taken straight from the digest bytes
+instead of rehashing. The filter file is memory-mapped when loaded.
+
+A negative answer is definitive; a positive one only means "maybe", and
+the caller falls through to the exact backend. The filter must be rebuilt
+whenever the corpus it was built from is refreshed.
+
+Usage:
+    python breach_filter.py pwned.corpus pwned.filter --fp-rate 0.01
+"""
+
+import argparse
+import math
+import mmap
+import struct
+import sys
+
+MAGIC = b'PWNBLOM1'
+HEADER = struct.Struct('<8sQHH')
+BLOCK_BYTES = 64
+BLOCK_BITS = BLOCK_BYTES * 8
+DEFAULT_FP_RATE = 0.01
+
+
+def filter_parameters(expected_keys, fp_rate=DEFAULT_FP_RATE):
+    """
+    Size a blocked Bloom filter for a key count and false-positive rate
+
+    Returns:
+        tuple: (number of 64-byte blocks, bits set per key)
+    """
+    bits_per_key = -math.log(fp_rate) / (math.log(2) ** 2)
+    # Blocking concentrates bits per key; a little headroom keeps the
+    # observed false-positive rate close to the requested one
+    bits_per_key *= 1.1
+    num_blocks = max(1, math.ceil(expected_keys * bits_per_key / BLOCK_BITS))
+    num_hashes = max(1, min(16, round(bits_per_key / 1.1 * math.log(2))))
+    return num_blocks, num_hashes
+
+
+def _positions(digest, num_blocks, num_hashes):
+    block = int.from_bytes(digest[0:8], 'big') % num_blocks
+    h1 = int.from_bytes(digest[8:12], 'big')
+    h2 = int.from_bytes(digest[12:16], 'big') | 1
+    base = block * BLOCK_BYTES
+    return base, [(h1 + i * h2) % BLOCK_BITS for i in range(num_hashes)]
+
+
+class BreachFilter:
+    def __init__(self, path):
+        """
+        Memory-map a filter file written by BreachFilterBuilder.save
+
+        Args:
+            path (str): Path to the filter file
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_blocks, self.num_hashes, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a breach filter file")
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def might_contain(self, digest):
+        """Return False if the digest is definitely not in the breach set"""
+        base, bits = _positions(digest, self.num_blocks, self.num_hashes)
+        base += HEADER.size
+        block = self._mm[base:base + BLOCK_BYTES]
+        for bit in bits:
+            if not block[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+
+class BreachFilterBuilder:
+    def __init__(self, expected_keys, fp_rate=DEFAULT_FP_RATE):
+        """
+        Build a filter in memory
+
+        Args:
+            expected_keys (int): Number of hashes that will be added
+            fp_rate (float): Target false-positive rate
+        """
+        self.num_blocks, self.num_hashes = filter_parameters(expected_keys, fp_rate)
+        self.bits = bytearray(self.num_blocks * BLOCK_BYTES)
+
+    def add(self, digest):
+        base, bits = _positions(digest, self.num_blocks, self.num_hashes)
+        for bit in bits:
+            self.bits[base + (bit >> 3)] |= 1 << (bit & 7)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.num_blocks, self.num_hashes, 0))
+            f.write(self.bits)
+
+
+def build_filter_from_corpus(corpus_path, output_path, fp_rate=DEFAULT_FP_RATE):
+    """
+    Build a filter over every hash in an offline corpus file
+
+    Returns:
+        int: Number of hashes added
+    """
+    from offline_corpus import OfflineCorpus
+
+    with OfflineCorpus(corpus_path) as corpus:
+        builder = BreachFilterBuilder(corpus.records, fp_rate)
+        for digest in corpus.iter_digests():
+            builder.add(digest)
+        builder.save(output_path)
+        return corpus.records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a breach pre-filter from an offline corpus")
+    parser.add_argument('corpus', help="Corpus file built by corpus_builder.py")
+    parser.add_argument('output', help="Filter file to write")
+    parser.add_argument('--fp-rate', type=float, default=DEFAULT_FP_RATE,
+                        help="Target false-positive rate (default: 0.01)")
+    args = parser.parse_args(argv)
+
+    added = build_filter_from_corpus(args.corpus, args.output, args.fp_rate)
+    print(f"✅ Added {added:,} hashes to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
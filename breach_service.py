@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Breach Service
+
+A long-running local daemon that answers breach and strength checks over
+HTTP (TCP or a Unix socket), so registration, password-change and audit
+code doesn't each pay for a cold start: a fresh connection, an empty cache
+and the `requests` import.
+
+The daemon keeps one pooled keep-alive session and an in-memory range
+cache warm for its whole lifetime. Concurrent checks whose hashes share a
+5-char prefix are coalesced by password_checker's singleflight, so however
+many requests arrive for a prefix at once, the range is fetched from
+upstream only once.
+Disk cache, offline corpus, pre-filter and metrics settings are taken from
+the usual PWNED_* environment variables.
+
+Endpoints (JSON in and out):
+    POST /check     {"password": "..."} or {"sha1": "..."}         -> {"count": n}
+                    {"passwords": [...]} or {"sha1": [...]}        -> {"counts": [...]}
+    POST /strength  {"password": "...", "user_inputs": [...]}      -> score, flags,
+                    feedback and the estimate_strength() result
+    GET  /health    liveness and service counters
+    GET  /metrics   Prometheus text, when PWNED_METRICS_* or --metrics is set
+
+Usage:
+    python breach_service.py --port 8787
+    python breach_service.py --socket /run/pwned.sock
+
+    from breach_service import ServiceClient
+    client = ServiceClient('/run/pwned.sock')     # or 'http://127.0.0.1:8787'
+    client.check('password123')
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import password_checker
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from password_checker import (current_memory_cache, current_metrics, current_range_flights,
+                              enable_memory_cache, get_range, get_session, hash_password,
+                              is_hex_hash, lookup_local)
+from password_strength import check_password_strength, strength_flags
+from strength_estimator import estimate_strength
+
+DEFAULT_PORT = 8787
+DEFAULT_POOL_SIZE = 64
+DEFAULT_MEMORY_CACHE_MB = 256
+# Largest request body accepted, e.g. a batch of passwords
+MAX_BODY_BYTES = 16 * 1024 * 1024
+JSON_CONTENT_TYPE = 'application/json'
+
+
+def _is_sha1(value):
+    # is_hex_hash also rejects whitespace, which bytes.fromhex() skips
+    return isinstance(value, str) and is_hex_hash(value)
+
+
+class BreachService:
+    def __init__(self, memory_cache_mb=DEFAULT_MEMORY_CACHE_MB, pool_size=DEFAULT_POOL_SIZE):
+        """
+        Breach and strength checks with warm, shared state
+
+        Args:
+            memory_cache_mb (float): Range cache budget, used unless a memory
+                cache is already enabled (0 or None: no memory cache)
+            pool_size (int): Keep-alive connections kept to the range API
+        """
+        if current_memory_cache() is None and memory_cache_mb:
+            enable_memory_cache(int(memory_cache_mb * 1024 * 1024))
+        get_session(pool_size)
+        self.started = time.time()
+        self.checks = 0
+        self._lock = threading.Lock()
+
+    def check_hashes(self, hashes):
+        """Breach counts for uppercase or lowercase SHA-1 hex digests"""
+        counts = [0] * len(hashes)
+        groups = {}
+        for index, digest in enumerate(hashes):
+            digest = digest.upper()
+            count = lookup_local(digest)
+            if count is not None:
+                counts[index] = count
+            else:
+                groups.setdefault(digest[:5], []).append((index, digest[5:]))
+        for prefix, entries in groups.items():
+            leaks = get_range(prefix)
+            for index, tail in entries:
+                counts[index] = leaks.get(tail, 0)
+        with self._lock:
+            self.checks += len(hashes)
+        return counts
+
+    def check_passwords(self, passwords):
+        return self.check_hashes([hash_password(password) for password in passwords])
+
+    def strength(self, password, user_inputs=()):
+        score, feedback = check_password_strength(password)
+        return {
+            'score': score,
+            'flags': strength_flags(password),
+            'feedback': feedback,
+            'estimate': estimate_strength(password, user_inputs),
+        }
+
+    def health(self):
+        memory_cache = current_memory_cache()
+        flights = current_range_flights()
+        with self._lock:
+            checks = self.checks
+        return {
+            'status': 'ok',
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'checks': checks,
+            'range_fetches': flights.calls,
+            'coalesced_fetches': flights.coalesced,
+            'memory_cache': memory_cache.stats() if memory_cache is not None else None,
+        }
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _check(service, body):
+    if 'password' in body or 'passwords' in body:
+        single = 'password' in body
+        passwords = [body['password']] if single else body['passwords']
+        if not isinstance(passwords, list) or not all(isinstance(p, str) for p in passwords):
+            raise BadRequest("passwords must be strings")
+        counts = service.check_passwords(passwords)
+    elif 'sha1' in body:
+        single = isinstance(body['sha1'], str)
+        hashes = [body['sha1']] if single else body['sha1']
+        if not isinstance(hashes, list) or not all(_is_sha1(h) for h in hashes):
+            raise BadRequest("sha1 must be 40-char hex digests")
+        counts = service.check_hashes(hashes)
+    else:
+        raise BadRequest("expected password, passwords or sha1")
+    return {'count': counts[0]} if single else {'counts': counts}
+
+
+def _strength(service, body):
+    password = body.get('password')
+    user_inputs = body.get('user_inputs', [])
+    if not isinstance(password, str) or not isinstance(user_inputs, list):
+        raise BadRequest("expected password and optional user_inputs list")
+    return service.strength(password, [str(value) for value in user_inputs])
+
+
+ROUTES = {'/check': _check, '/strength': _strength}
+
+
+def make_handler(service):
+    class ServiceHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so clients pay for a connection once
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, status, body, content_type=JSON_CONTENT_TYPE):
+            if not isinstance(body, bytes):
+                body = json.dumps(body, separators=(',', ':')).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/health':
+                self.send_body(200, service.health())
+            elif path == '/metrics' and current_metrics() is not None:
+                self.send_body(200, current_metrics().render().encode('utf-8'), METRICS_CONTENT_TYPE)
+            else:
+                self.send_body(404, {'error': 'not found'})
+
+        def do_POST(self):
+            route = ROUTES.get(self.path.split('?', 1)[0])
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # rfile.read(-1) would block until the client hangs up
+                self.close_connection = True
+                self.send_body(400, {'error': 'invalid Content-Length'})
+                return
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True
+                self.send_body(413, {'error': 'request body too large'})
+                return
+            data = self.rfile.read(length)
+            if route is None:
+                self.send_body(404, {'error': 'not found'})
+                return
+            try:
+                body = json.loads(data or b'{}', strict=False)
+                if not isinstance(body, dict):
+                    raise BadRequest("expected a JSON object")
+                self.send_body(200, route(service, body))
+            except (BadRequest, ValueError) as e:
+                self.send_body(400, {'error': str(e)})
+            except Exception as e:
+                # Upstream failures (RuntimeError from the range fetch, network errors)
+                self.send_body(502, {'error': str(e)})
+
+    return ServiceHandler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def start_service(port=DEFAULT_PORT, host='127.0.0.1', socket_path=None, service=None):
+    """
+    Serve a BreachService from a background thread
+
+    Args:
+        port (int): TCP port (0 picks a free one), ignored with socket_path
+        host (str): Interface to listen on
+        socket_path (str): Listen on this Unix socket instead of TCP
+        service (BreachService): Service to expose (a new one by default)
+
+    Returns:
+        server: call shutdown() to stop it; .service is the BreachService
+    """
+    service = service or BreachService()
+    handler = make_handler(service)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        # TCP_NODELAY doesn't apply to Unix sockets
+        handler = type('UnixServiceHandler', (handler,), {'disable_nagle_algorithm': False})
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    def __init__(self, address=f'http://127.0.0.1:{DEFAULT_PORT}', timeout=30.0):
+        """
+        Client for a running breach service
+
+        Uses only the standard library, and keeps one keep-alive connection
+        per thread.
+
+        Args:
+            address (str): 'http://host:port' or the path of a Unix socket
+            timeout (float): Socket timeout in seconds
+        """
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.address.startswith('http://'):
+                connection = http.client.HTTPConnection(self.address[len('http://'):].rstrip('/'),
+                                                        timeout=self.timeout)
+            else:
+                connection = _UnixHTTPConnection(self.address, self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def request(self, method, path, body=None):
+        data = None if body is None else json.dumps(body).encode('utf-8')
+        headers = {'Content-Type': JSON_CONTENT_TYPE} if data is not None else {}
+        for attempt in (0, 1):
+            connection = self._connection()
+            try:
+                connection.request(method, path, data, headers)
+                res = connection.getresponse()
+                payload = json.loads(res.read())
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server dropped an idle keep-alive connection; reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        if res.status != 200:
+            raise RuntimeError(f"Breach service error {res.status}: {payload.get('error')}")
+        return payload
+
+    def check(self, password):
+        """Breach count for one password"""
+        return self.request('POST', '/check', {'password': password})['count']
+
+    def check_many(self, passwords):
+        """Breach counts for many passwords, in input order"""
+        return self.request('POST', '/check', {'passwords': list(passwords)})['counts']
+
+    def check_sha1(self, digests):
+        """Breach counts for SHA-1 hex digests, so plaintext never leaves the caller"""
+        return self.request('POST', '/check', {'sha1': list(digests)})['counts']
+
+    def strength(self, password, user_inputs=()):
+        return self.request('POST', '/strength', {'password': password,
+                                                  'user_inputs': list(user_inputs)})
+
+    def health(self):
+        return self.request('GET', '/health')
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve breach and strength checks from a warm daemon")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument('--socket', help="Listen on this Unix socket instead of TCP")
+    parser.add_argument('--memory-cache-mb', type=float, default=DEFAULT_MEMORY_CACHE_MB,
+                        help="In-memory range cache budget")
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                        help="Keep-alive connections to the range API")
+    parser.add_argument('--metrics', action='store_true', help="Record metrics and serve /metrics")
+    args = parser.parse_args(argv)
+
+    if args.metrics and current_metrics() is None:
+        from metrics import MetricsRegistry
+        password_checker.use_metrics(MetricsRegistry())
+    service = BreachService(args.memory_cache_mb, args.pool_size)
+    server = start_service(args.port, args.host, args.socket, service)
+    where = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"🔐 Breach service listening on {where}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.shutdown()
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
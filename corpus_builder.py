@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Corpus Builder
+
+Converts the downloadable Pwned Passwords 'HASH:COUNT' text dump into the
+binary corpus format read by offline_corpus.OfflineCorpus.
+
+The dump is streamed in chunks: hex hashes are decoded to bytes a chunk at
+a time, each chunk is sorted and spilled to a temporary run file, and the
+runs are merged into the final corpus. Memory use depends on the run size,
+not on the size of the input. Already-sorted input (such as the official
+dump) is detected and the runs are concatenated instead of heap-merged.
+
+The NTLM dump builds a corpus with 16-byte keys; load it with
+PWNED_NTLM_CORPUS_PATH or use_offline_corpus(path, 'ntlm').
+
+Usage:
+    python corpus_builder.py pwned-passwords-sha1.txt pwned.corpus
+    python corpus_builder.py pwned-passwords-ntlm.txt pwned-ntlm.corpus --ntlm
+"""
+
+import argparse
+import binascii
+import heapq
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+from offline_corpus import COUNT, NTLM_SIZE, SHA1_SIZE, write_corpus
+
+DEFAULT_RUN_SIZE = 4 * 1024 * 1024
+READ_HINT = 8 * 1024 * 1024
+MAX_FAN_IN = 128
+
+
+class Progress:
+    """Throughput reporting for a long-running build"""
+
+    def __init__(self, total_bytes=None, interval=5.0, stream=sys.stderr):
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.stream = stream
+        self.started = time.monotonic()
+        self.last_report = self.started
+        self.lines = 0
+        self.bytes_read = 0
+
+    def update(self, lines, bytes_read):
+        self.lines += lines
+        self.bytes_read += bytes_read
+        now = time.monotonic()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report("reading")
+
+    def report(self, phase):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.lines / elapsed
+        mb_rate = self.bytes_read / elapsed / (1024 * 1024)
+        done = ""
+        if self.total_bytes:
+            done = f" ({self.bytes_read / self.total_bytes * 100:.1f}%)"
+        print(f"{phase}: {self.lines:,} hashes{done} - "
+              f"{rate:,.0f} hashes/s, {mb_rate:.1f} MB/s, {elapsed:.0f}s elapsed",
+              file=self.stream)
+
+
+def parse_lines(lines, key_size=SHA1_SIZE):
+    """
+    Parse a chunk of 'HASH:COUNT' lines into packed records
+
+    Returns:
+        list: digest + big-endian uint32 count records, in input order
+    """
+    hexes = []
+    counts = []
+    for line in lines:
+        digest, _, count = line.partition(b':')
+        digest = digest.strip()
+        if not digest:
+            continue
+        hexes.append(digest)
+        counts.append(int(count) if count.strip() else 0)
+
+    # One unhexlify call per chunk instead of one per line
+    digests = binascii.unhexlify(b''.join(hexes))
+    if len(digests) != key_size * len(counts):
+        raise ValueError(f"Expected {key_size * 2}-char hex hashes in input")
+    pack = COUNT.pack
+    return [
+        digests[i * key_size:(i + 1) * key_size] + pack(min(count, 0xFFFFFFFF))
+        for i, count in enumerate(counts)
+    ]
+
+
+def iter_run(path, record_size, block_records=4096):
+    """Yield records from a run file using large sequential reads"""
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(record_size * block_records)
+            if not block:
+                return
+            for offset in range(0, len(block), record_size):
+                yield block[offset:offset + record_size]
+
+
+def write_run(records, tmpdir):
+    fd, path = tempfile.mkstemp(prefix='corpus-run-', suffix='.bin', dir=tmpdir)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(records))
+    return path
+
+
+def merge_runs(runs, record_size, ordered):
+    """Yield records from all runs in digest order"""
+    iterators = [iter_run(path, record_size) for path in runs]
+    if ordered:
+        return itertools.chain.from_iterable(iterators)
+    return heapq.merge(*iterators)
+
+
+def reduce_runs(runs, record_size, tmpdir):
+    """Merge runs in passes until there are few enough to open at once"""
+    first_level = runs
+    while len(runs) > MAX_FAN_IN:
+        merged = []
+        completed = False
+        try:
+            for i in range(0, len(runs), MAX_FAN_IN):
+                group = runs[i:i + MAX_FAN_IN]
+                fd, path = tempfile.mkstemp(prefix='corpus-run-', suffix='.bin', dir=tmpdir)
+                merged.append(path)
+                with os.fdopen(fd, 'wb') as f:
+                    buffer = []
+                    for record in merge_runs(group, record_size, ordered=False):
+                        buffer.append(record)
+                        if len(buffer) >= 65536:
+                            f.write(b''.join(buffer))
+                            buffer = []
+                    f.write(b''.join(buffer))
+                for old in group:
+                    os.remove(old)
+            completed = True
+        finally:
+            if not completed:
+                # The caller removes the first-level runs; intermediate runs
+                # from this pass or an earlier one are only known here
+                leftovers = merged if runs is first_level else merged + runs
+                for path in leftovers:
+                    if os.path.exists(path):
+                        os.remove(path)
+        runs = merged
+    return runs
+
+
+def combine_duplicates(records, key_size):
+    """Yield (digest, count) pairs, summing counts of repeated digests"""
+    current = None
+    total = 0
+    for record in records:
+        digest = record[:key_size]
+        count = COUNT.unpack_from(record, key_size)[0]
+        if digest == current:
+            total += count
+            continue
+        if current is not None:
+            yield current, total
+        current, total = digest, count
+    if current is not None:
+        yield current, total
+
+
+def build_corpus(input_path, output_path, run_size=DEFAULT_RUN_SIZE,
+                 key_size=SHA1_SIZE, tmpdir=None, progress=None):
+    """
+    Stream a 'HASH:COUNT' text dump into a binary corpus file
+
+    Args:
+        input_path (str): Text dump to read
+        output_path (str): Corpus file to create
+        run_size (int): Records sorted in memory per temporary run
+        key_size (int): Digest width in bytes (20 for SHA-1)
+        tmpdir (str): Directory for temporary run files
+        progress (Progress): Optional throughput reporter
+
+    Returns:
+        int: Number of distinct hashes written
+    """
+    record_size = key_size + COUNT.size
+    tmpdir = tmpdir or os.path.dirname(os.path.abspath(output_path))
+    runs = []
+    ordered = True
+    previous_last = None
+    run = []
+
+    def flush_run():
+        nonlocal ordered, previous_last
+        # Timsort is linear on input that is already in order
+        run.sort()
+        if previous_last is not None and run[0] <= previous_last:
+            ordered = False
+        previous_last = run[-1]
+        runs.append(write_run(run, tmpdir))
+        run.clear()
+
+    try:
+        with open(input_path, 'rb') as f:
+            while True:
+                lines = f.readlines(READ_HINT)
+                if not lines:
+                    break
+                run.extend(parse_lines(lines, key_size))
+                if progress:
+                    progress.update(len(lines), sum(len(line) for line in lines))
+                if len(run) >= run_size:
+                    flush_run()
+        if run:
+            flush_run()
+
+        if progress:
+            progress.report("sorted runs written")
+        if not ordered:
+            runs = reduce_runs(runs, record_size, tmpdir)
+        records = combine_duplicates(merge_runs(runs, record_size, ordered), key_size)
+        written = write_corpus(output_path, records, key_size=key_size)
+        if progress:
+            progress.report("corpus written")
+        return written
+    finally:
+        for path in runs:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build a binary offline corpus from a Pwned Passwords HASH:COUNT dump")
+    parser.add_argument('input', help="Text dump, one HASH:COUNT per line")
+    parser.add_argument('output', help="Corpus file to write")
+    parser.add_argument('--run-size', type=int, default=DEFAULT_RUN_SIZE,
+                        help="Records sorted in memory per temporary run")
+    parser.add_argument('--tmpdir', help="Directory for temporary run files")
+    parser.add_argument('--ntlm', action='store_true', help="The dump holds NTLM hashes")
+    args = parser.parse_args(argv)
+
+    progress = Progress(total_bytes=os.path.getsize(args.input))
+    written = build_corpus(args.input, args.output, run_size=args.run_size,
+                           key_size=NTLM_SIZE if args.ntlm else SHA1_SIZE,
+                           tmpdir=args.tmpdir, progress=progress)
+    print(f"✅ Wrote {written:,} hashes to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Digest Set
+
+A compact set of fixed-width digests (20-byte SHA-1 or 16-byte NTLM) for
+deduplicating large batches. The distinct digests are packed end to end
+in one bytearray, in first-seen order, and an open-addressing table of
+int32 positions indexes them, so each digest costs its own width plus a
+few bytes of table instead of a bytes object and a dict entry.
+
+Digests are already uniformly distributed, so table slots are taken
+straight from the digest bytes instead of rehashing.
+"""
+
+from array import array
+
+MIN_SLOTS = 1024
+
+
+class DigestSet:
+    def __init__(self, key_size, capacity=0):
+        """
+        Args:
+            key_size (int): Digest width in bytes
+            capacity (int): Expected number of distinct digests
+        """
+        self.key_size = key_size
+        self._packed = bytearray()
+        self._count = 0
+        slots = MIN_SLOTS
+        while slots < capacity * 2:
+            slots *= 2
+        self._allocate(slots)
+
+    def _allocate(self, slots):
+        self._mask = slots - 1
+        self._slots = array('i', [-1]) * slots
+
+    def _slot(self, digest):
+        """Slot holding digest, or the empty slot where it belongs"""
+        size = self.key_size
+        packed = self._packed
+        slots = self._slots
+        mask = self._mask
+        slot = int.from_bytes(digest[:8], 'little') & mask
+        while True:
+            position = slots[slot]
+            if position < 0:
+                return slot
+            offset = position * size
+            if packed[offset:offset + size] == digest:
+                return slot
+            slot = (slot + 1) & mask
+
+    def add(self, digest):
+        """
+        Add a digest unless it is already present
+
+        Returns:
+            int: The digest's position (first-seen order)
+        """
+        if len(digest) != self.key_size:
+            raise ValueError(f"Expected a {self.key_size}-byte digest")
+        slot = self._slot(digest)
+        position = self._slots[slot]
+        if position >= 0:
+            return position
+        position = self._count
+        self._slots[slot] = position
+        self._packed += digest
+        self._count += 1
+        # Keep the table at most half full so probe runs stay short
+        if self._count * 2 > len(self._slots):
+            self._grow()
+        return position
+
+    def _grow(self):
+        size = self.key_size
+        packed = self._packed
+        self._allocate(len(self._slots) * 2)
+        slots = self._slots
+        mask = self._mask
+        for position in range(self._count):
+            slot = int.from_bytes(packed[position * size:position * size + 8], 'little') & mask
+            while slots[slot] >= 0:
+                slot = (slot + 1) & mask
+            slots[slot] = position
+
+    def find(self, digest):
+        """Position of digest, or -1 if it is not in the set"""
+        if len(digest) != self.key_size:
+            return -1
+        return self._slots[self._slot(digest)]
+
+    def __contains__(self, digest):
+        return self.find(digest) >= 0
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, position):
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        offset = position * self.key_size
+        return bytes(self._packed[offset:offset + self.key_size])
+
+    def __iter__(self):
+        size = self.key_size
+        packed = self._packed
+        for offset in range(0, len(packed), size):
+            yield bytes(packed[offset:offset + size])
+
+    @property
+    def packed(self):
+        """The distinct digests packed end to end, in first-seen order"""
+        return bytes(self._packed)
+
+    @property
+    def nbytes(self):
+        return len(self._packed) + self._slots.itemsize * len(self._slots)
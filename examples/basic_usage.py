@@ -13,6 +13,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from password_checker import pwned_api_check
+from password_strength import DIGIT, LENGTH, LOWER, SPECIAL, UPPER, strength_flags
+from strength_estimator import estimate_strength
 
 def example_single_password_check():
     """Example 1: Check a single password"""
@@ -64,19 +66,18 @@ def example_password_validation_function():
         Returns: (is_valid, issues, breach_count)
         """
         issues = []
+        # Length and character variety, classified in one pass
+        flags = strength_flags(password, min_length)
         
-        # Length check
-        if len(password) < min_length:
+        if not flags & LENGTH:
             issues.append(f"Password must be at least {min_length} characters long")
-        
-        # Character variety checks
-        if not any(c.islower() for c in password):
+        if not flags & LOWER:
             issues.append("Password must contain lowercase letters")
-        if not any(c.isupper() for c in password):
+        if not flags & UPPER:
             issues.append("Password must contain uppercase letters")
-        if not any(c.isdigit() for c in password):
+        if not flags & DIGIT:
             issues.append("Password must contain numbers")
-        if not any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
+        if not flags & SPECIAL:
             issues.append("Password must contain special characters")
         
         # Breach check
@@ -152,6 +153,12 @@ def example_integration_with_user_registration():
         if len(password) < 8:
             return False, "Password must be at least 8 characters long"
         
+        # Reject guessable patterns ("Password1!") before asking the API
+        estimate = estimate_strength(password, user_inputs=[username])
+        if estimate['score'] < 3:
+            reason = estimate['warning'] or "This password is too easy to guess"
+            return False, f"{reason}. {' '.join(estimate['suggestions'])}".strip()
+        
         # Check if password is compromised
         try:
             breach_count = pwned_api_check(password)
@@ -174,6 +181,7 @@ def example_integration_with_user_registration():
         ("user1", "password123"),  # Very compromised
         ("user2", "MyStr0ng!P@ssw0rd2024"),  # Should be safe
         ("user3", "short"),  # Too short
+        ("user4", "Password1!"),  # Meets the character rules but easy to guess
     ]
     
     for username, password in test_cases:
@@ -4,88 +4,788 @@ Batch Password Checker
 
 This script demonstrates how to check multiple passwords from a file
 or list, useful for security audits or password policy enforcement.
+
+Audits of hash exports (e.g. from Active Directory) can skip plaintext
+entirely: with a hash input format, inputs are SHA-1 or NTLM hashes, as
+hex lines or raw fixed-width binary digests, and are looked up as they are.
 """
 
 import sys
 import os
-import csv
+import argparse
+import heapq
+import itertools
+import json
 import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from password_checker import pwned_api_check
+from digest_set import DigestSet
+from metrics import MetricsRegistry
+from password_checker import (HASH_LENGTHS, apply_backend_config, backend_config,
+                              dedupe_digests, digest_not_breached, digest_tail, get_range,
+                              get_session, group_digests, hex_digest, password_digest,
+                              use_metrics, use_rate_limiter)
+from rate_limiter import AdaptiveRateLimiter
+from result_sinks import CSVSink, open_sink
+
+DEFAULT_CHUNK_SIZE = 10000
+READ_BUFFER_SIZE = 1024 * 1024
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+PROCESS_CHUNK_SIZE = 50000
+DEFAULT_TOP_N = 10
+# plaintext passwords, hex hash lines, or raw binary digests
+INPUT_FORMATS = ('plaintext', 'sha1', 'ntlm', 'sha1-raw', 'ntlm-raw')
+
+def init_worker(config, limiter_settings):
+    """Worker process initializer: the parent's lookup backends and its share of the rate limit"""
+    apply_backend_config(config)
+    use_rate_limiter(AdaptiveRateLimiter(**limiter_settings))
+
+def digest_chunk(passwords):
+    """Hash a chunk of passwords inside a worker process; returns the packed digests"""
+    return b''.join(map(password_digest, passwords))
+
+def all_ruled_out(packed, indexes, mode='sha1'):
+    """True when the prefilter rules out every listed digest (it is SHA-1 only)"""
+    if mode != 'sha1':
+        return False
+    return all(digest_not_breached(packed[i * 20:i * 20 + 20]) for i in indexes)
+
+def resolve_chunk(packed, mode='sha1'):
+    """
+    Resolve a chunk of distinct raw digests inside a worker process
+    
+    Args:
+        packed (bytes): Digests packed end to end
+        mode (str): 'sha1' or 'ntlm'
+    
+    Returns:
+        tuple: (breach counts packed as int64 bytes, with -1 marking an
+        error, {chunk offset: error message} for those entries)
+    """
+    counts = array('q', bytes(8 * (len(packed) // (HASH_LENGTHS[mode] // 2))))
+    errors = {}
+    for prefix, indexes in group_digests(packed, mode).items():
+        if all_ruled_out(packed, indexes, mode):
+            continue
+        try:
+            leaks = get_range(prefix, mode=mode)
+        except Exception as e:
+            for index in indexes:
+                counts[index] = -1
+                errors[index] = str(e)
+            continue
+        for index in indexes:
+            counts[index] = leaks.get(digest_tail(packed, index, mode), 0)
+    return counts.tobytes(), errors
+
+
+class RepeatCounter:
+    def __init__(self, mode='sha1'):
+        """
+        Rows seen so far per distinct digest, kept across the chunks of a
+        streamed audit so repeats in later chunks are still recognised
+        
+        Memory grows by about 30 bytes per distinct digest, so streamed
+        audits only keep one when asked to (track_repeats=True).
+        
+        Args:
+            mode (str): 'sha1' or 'ntlm'
+        """
+        self.mode = mode
+        self.digests = DigestSet(HASH_LENGTHS[mode] // 2)
+        self.rows = array('q')
+    
+    def add(self, digest):
+        """Count one row with digest; returns the rows with it so far, this one included"""
+        position = self.digests.add(digest)
+        if position == len(self.rows):
+            self.rows.append(0)
+        self.rows[position] += 1
+        return self.rows[position]
+    
+    def save(self, path):
+        """Durably write the counts to path (the packed digests, then int64 row counts)"""
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(self.digests.packed)
+            f.write(self.rows.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    
+    @classmethod
+    def load(cls, path, mode='sha1'):
+        counter = cls(mode)
+        with open(path, 'rb') as f:
+            data = f.read()
+        size = counter.digests.key_size
+        count = len(data) // (size + counter.rows.itemsize)
+        for offset in range(0, count * size, size):
+            counter.digests.add(data[offset:offset + size])
+        counter.rows.frombytes(data[count * size:])
+        return counter
+
+
+def save_checkpoint(path, state):
+    """Durably replace the checkpoint file with state"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    """Return the saved checkpoint state, or None if there is none"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class ReportAggregator:
+    def __init__(self, top_n=DEFAULT_TOP_N, distinct=True):
+        """
+        Running report statistics, updated one result at a time
+        
+        Keeps status counts, a bounded min-heap of the top_n most breached
+        passwords and a histogram of breach counts by order of magnitude,
+        so a report can be produced at any point of a run in O(1) memory.
+        Repeated passwords (results marked by iter_results with
+        'occurrences' / 'duplicate') are ranked once, with their
+        occurrence count, and counted as reuse. Streamed results count
+        occurrences so far instead (see add(running=True)).
+        
+        A password seen again in a later chunk of a streamed audit is
+        merged into its ranked entry, so the top list never repeats a
+        password. Unique and reuse counts need every distinct hash, though;
+        streamed audits without repeat tracking pass distinct=False and
+        leave them out of the report.
+        
+        Args:
+            top_n (int): Number of most compromised passwords to keep
+            distinct (bool): Whether unique and reuse counts cover the
+                whole input
+        """
+        self.top_n = top_n
+        self.distinct = distinct
+        self.counts = {'SAFE': 0, 'COMPROMISED': 0, 'ERROR': 0}
+        # Histogram bucket d counts breach counts with d digits (0 = SAFE)
+        self.histogram = {}
+        # Distinct passwords seen, and how many of them (and rows) were repeated
+        self.unique = 0
+        self.reused = 0
+        self.reused_rows = 0
+        # (breach count, -sequence, password, occurrences): on ties the
+        # earliest result wins
+        self._heap = []
+        self._sequence = 0
+    
+    @property
+    def total(self):
+        return sum(self.counts.values())
+    
+    def add(self, result, running=False):
+        """
+        Fold one result dict into the aggregates
+        
+        Args:
+            result (dict): A result from iter_results
+            running (bool): The result's 'occurrences' counts the rows with
+                its hash so far, as in streamed audits, rather than all of them
+        """
+        status = result['status']
+        self.counts[status] = self.counts.get(status, 0) + 1
+        duplicate = result.get('duplicate', False)
+        occurrences = result.get('occurrences', 1)
+        if not duplicate:
+            self.unique += 1
+            if occurrences > 1 and not running:
+                self.reused += 1
+                self.reused_rows += occurrences
+        elif running:
+            # The second row makes a hash reused; later rows only add to it
+            if occurrences == 2:
+                self.reused += 1
+                self.reused_rows += 1
+            self.reused_rows += 1
+        if status == 'ERROR':
+            return
+        breach_count = result['breach_count']
+        bucket = len(str(breach_count)) if breach_count else 0
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        if not breach_count:
+            return
+        if duplicate:
+            if running:
+                self._recount(result['password'], occurrences)
+            return
+        if self._merge(result['password'], occurrences):
+            return
+        self._sequence += 1
+        entry = (breach_count, -self._sequence, result['password'], occurrences)
+        if len(self._heap) < self.top_n:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def _recount(self, password, occurrences):
+        # The ranking key is unchanged, so the heap stays valid
+        for i, entry in enumerate(self._heap):
+            if entry[2] == password:
+                self._heap[i] = entry[:3] + (occurrences,)
+                return
+    
+    def _merge(self, password, occurrences):
+        # The same password ranked from an earlier chunk; a password that
+        # was not kept then has a breach count too low to be kept now
+        for i, entry in enumerate(self._heap):
+            if entry[2] == password:
+                self._heap[i] = entry[:3] + (entry[3] + occurrences,)
+                return True
+        return False
+    
+    __call__ = add
+    
+    def update(self, results):
+        for result in results:
+            self.add(result)
+        return self
+    
+    def top(self):
+        """Most compromised passwords as (password, breach count, occurrences), highest first"""
+        return [(password, count, occurrences)
+                for count, _, password, occurrences in sorted(self._heap, reverse=True)]
+    
+    def to_state(self):
+        """JSON-serialisable snapshot, e.g. for a checkpoint"""
+        return {
+            'top_n': self.top_n,
+            'distinct': self.distinct,
+            'counts': dict(self.counts),
+            'histogram': {str(bucket): n for bucket, n in self.histogram.items()},
+            'unique': self.unique,
+            'reused': self.reused,
+            'reused_rows': self.reused_rows,
+            'top': [list(entry) for entry in self._heap],
+            'sequence': self._sequence,
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        report = cls(state['top_n'], state.get('distinct', True))
+        report.counts.update(state['counts'])
+        report.histogram = {int(bucket): n for bucket, n in state['histogram'].items()}
+        # Older states predate occurrence tracking
+        report.unique = state.get('unique', report.total)
+        report.reused = state.get('reused', 0)
+        report.reused_rows = state.get('reused_rows', 0)
+        report._heap = [tuple(entry) + (1,) * (4 - len(entry)) for entry in state['top']]
+        heapq.heapify(report._heap)
+        report._sequence = state['sequence']
+        return report
+    
+    def render(self):
+        """Return the report text"""
+        total = self.total
+        safe = self.counts['SAFE']
+        compromised = self.counts['COMPROMISED']
+        errors = self.counts['ERROR']
+        top = self.top()
+        
+        report = []
+        report.append("🔐 BATCH PASSWORD SECURITY REPORT")
+        report.append("=" * 50)
+        report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        report.append("")
+        
+        report.append("📊 SUMMARY STATISTICS")
+        report.append("-" * 30)
+        report.append(f"Total Passwords Checked: {total}")
+        report.append(f"✅ Safe Passwords: {safe} ({safe/total*100:.1f}%)")
+        report.append(f"❌ Compromised Passwords: {compromised} ({compromised/total*100:.1f}%)")
+        report.append(f"⚠️  Errors: {errors} ({errors/total*100:.1f}%)")
+        if self.distinct:
+            report.append(f"🔑 Unique Passwords: {self.unique}")
+        if self.distinct and self.reused:
+            report.append(f"🔁 Reused Passwords: {self.reused} "
+                          f"(shared by {self.reused_rows} entries)")
+        report.append("")
+        
+        if top:
+            password, breach_count, occurrences = top[0]
+            report.append("🚨 MOST COMPROMISED PASSWORD")
+            report.append("-" * 30)
+            report.append(f"Password: {password}")
+            report.append(f"Found in breaches: {breach_count:,} times")
+            if occurrences > 1:
+                report.append(f"Occurrences in input: {occurrences:,}")
+            report.append("")
+            
+            report.append(f"🔝 TOP {self.top_n} MOST COMPROMISED PASSWORDS")
+            report.append("-" * 40)
+            for i, (password, breach_count, occurrences) in enumerate(top, 1):
+                used = f", used {occurrences:,} times" if occurrences > 1 else ""
+                report.append(f"{i:2d}. {password} ({breach_count:,} times{used})")
+            report.append("")
+            
+            report.append("📈 BREACH COUNT DISTRIBUTION")
+            report.append("-" * 30)
+            labels = {bucket: "not found" if bucket == 0 else
+                      f"{10 ** (bucket - 1):,}-{10 ** bucket - 1:,} times"
+                      for bucket in self.histogram}
+            width = max(map(len, labels.values()))
+            for bucket in sorted(self.histogram):
+                report.append(f"{labels[bucket]:>{width}}: {self.histogram[bucket]}")
+            report.append("")
+        
+        # Recommendations
+        report.append("💡 RECOMMENDATIONS")
+        report.append("-" * 20)
+        if compromised > 0:
+            report.append("🔴 URGENT: Change all compromised passwords immediately")
+            report.append("🔸 Use unique passwords for each account")
+            report.append("🔸 Consider using a password manager")
+            report.append("🔸 Enable two-factor authentication where possible")
+        else:
+            report.append("🟢 Great! No compromised passwords found")
+            report.append("🔸 Continue using strong, unique passwords")
+            report.append("🔸 Regular security checkups are recommended")
+        
+        return '\n'.join(report)
+
 
 class BatchPasswordChecker:
-    def __init__(self, delay=0.5):
+    def __init__(self, delay=None, workers=1, ordered=True, rate_limit=None, max_rate=None,
+                 processes=1, input_format='plaintext'):
         """
         Initialize batch checker with API rate limiting
         
+        Requests pass through an adaptive token bucket: the rate climbs
+        while the API keeps answering and backs off on 429/503, honouring
+        Retry-After, so throttled ranges are retried instead of lost.
+        
         Args:
-            delay (float): Delay between API calls to respect rate limits
+            delay (float): Minimum seconds between requests; kept for
+                compatibility and equivalent to max_rate=1/delay
+            workers (int): Number of range requests to run in parallel
+            ordered (bool): Deliver results in input order; when False they
+                are delivered as soon as each range completes
+            rate_limit (float): Starting requests per second (None starts
+                unthrottled)
+            max_rate (float): Never exceed this many requests per second
+            processes (int): Hash and resolve in this many worker processes;
+                meant for local backends (offline corpus, disk cache) where
+                per-password CPU work rather than the network is the limit.
+                Each process gets an equal share of the rate limit
+            input_format (str): 'plaintext', or 'sha1' / 'ntlm' for inputs
+                that are already hashed (hex digests; from files, one per
+                line, or raw binary digests with 'sha1-raw' / 'ntlm-raw').
+                Hashes are looked up without hashing, and results carry the
+                hash in place of the password
         """
+        if input_format not in INPUT_FORMATS:
+            raise ValueError(f"Unknown input format {input_format!r}")
+        if delay and max_rate is None:
+            max_rate = 1.0 / delay
+        if rate_limit is None:
+            rate_limit = max_rate
         self.delay = delay
+        self.workers = max(1, workers)
+        self.ordered = ordered
+        self.limiter = AdaptiveRateLimiter(rate=rate_limit, max_rate=max_rate)
+        self.processes = max(1, processes)
+        self.input_format = input_format
+        # Hash type of the inputs, None for plaintext
+        self.hash_mode = None if input_format == 'plaintext' else input_format.split('-')[0]
+        # Hash type looked up (plaintext is hashed to SHA-1)
+        self.mode = self.hash_mode or 'sha1'
+        self._process_pool = None
         self.results = []
+        self.report = ReportAggregator()
+        if self.workers > 1:
+            # Size the shared connection pool so no worker waits on a socket
+            get_session(pool_size=self.workers)
     
-    def check_passwords_from_list(self, passwords, show_progress=True):
+    def _fetch_group(self, packed, prefix, entries):
+        """Resolve one hash prefix; returns (prefix, entries, leaks, error)"""
+        # A prefilter miss is definitive, so a range where every digest
+        # is ruled out never needs to be fetched
+        if all_ruled_out(packed, entries, self.mode):
+            return prefix, entries, {}, None
+        try:
+            return prefix, entries, get_range(prefix, self.limiter, self.mode), None
+        except Exception as e:
+            return prefix, entries, None, e
+    
+    def _completed_groups(self, packed, groups):
+        """Yield resolved groups of packed digests, fetching up to self.workers ranges at once"""
+        if self.workers == 1:
+            for prefix, entries in groups.items():
+                yield self._fetch_group(packed, prefix, entries)
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            items = iter(groups.items())
+            try:
+                # Keep a bounded number of groups in flight instead of
+                # submitting every prefix up front
+                for prefix, entries in itertools.islice(items, self.workers * 2):
+                    pending.add(executor.submit(self._fetch_group, packed, prefix, entries))
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                        for prefix, entries in itertools.islice(items, 1):
+                            pending.add(executor.submit(self._fetch_group, packed,
+                                                        prefix, entries))
+            finally:
+                for future in pending:
+                    future.cancel()
+    
+    def _process_pool_executor(self):
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=init_worker,
+                initargs=(backend_config(), self._worker_limiter_settings()))
+        return self._process_pool
+    
+    def _worker_limiter_settings(self):
+        """AdaptiveRateLimiter arguments giving each worker process an equal share of the rate"""
+        limiter = self.limiter
+        processes = self.processes
+        return {
+            'rate': None if limiter.rate is None else limiter.rate / processes,
+            'max_rate': None if limiter.max_rate is None else limiter.max_rate / processes,
+            'min_rate': limiter.min_rate / processes,
+            'increase': limiter.increase / processes,
+            'max_retries': limiter.max_retries,
+            'base_backoff': limiter.base_backoff,
+            'max_backoff': limiter.max_backoff,
+        }
+    
+    def _process_chunks(self, items):
+        """Split items into chunks, several per process to keep every core busy to the end"""
+        size = max(1, min(PROCESS_CHUNK_SIZE, -(-len(items) // (self.processes * 4))))
+        return [(start, items[start:start + size]) for start in range(0, len(items), size)]
+    
+    def _digests(self, items):
+        """Raw digest of every input, None for malformed hashes"""
+        if self.hash_mode is not None:
+            # Raw digests (bytes, as read from *-raw files) are used as they are
+            size = HASH_LENGTHS[self.hash_mode] // 2
+            return [(item if len(item) == size else None) if isinstance(item, bytes)
+                    else hex_digest(item, self.hash_mode) for item in items]
+        if self.processes == 1:
+            return list(map(password_digest, items))
+        # Hash in the worker processes, which send back packed digests
+        pool = self._process_pool_executor()
+        digests = []
+        for packed in pool.map(digest_chunk, [chunk for _, chunk in self._process_chunks(items)]):
+            digests.extend(packed[i:i + 20] for i in range(0, len(packed), 20))
+        return digests
+    
+    def _resolved_by_threads(self, packed):
+        """Yield (index, breach count, error) from prefix groups fetched on threads"""
+        groups = group_digests(packed, self.mode)
+        for prefix, entries, leaks, error in self._completed_groups(packed, groups):
+            for index in entries:
+                if error is None:
+                    yield index, leaks.get(digest_tail(packed, index, self.mode), 0), None
+                else:
+                    yield index, None, error
+    
+    def _resolved_by_processes(self, packed):
+        """Yield (index, breach count, error) from chunks resolved in worker processes"""
+        pool = self._process_pool_executor()
+        size = HASH_LENGTHS[self.mode] // 2
+        # Workers get slices of the packed digests, which pickle as one bytes object each
+        chunks = [(start, packed[start * size:(start + len(chunk)) * size])
+                  for start, chunk in self._process_chunks(range(len(packed) // size))]
+        futures = [pool.submit(resolve_chunk, chunk, self.mode) for _, chunk in chunks]
+        for (start, _), future in zip(chunks, futures):
+            packed, errors = future.result()
+            counts = array('q')
+            counts.frombytes(packed)
+            for offset, count in enumerate(counts):
+                if count < 0:
+                    yield start + offset, None, errors[offset]
+                else:
+                    yield start + offset, count, None
+    
+    def close(self):
+        """Shut down worker processes started for processes > 1"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+    
+    def iter_results(self, passwords, show_progress=True, repeat_counter=None):
         """
-        Check a list of passwords for breaches
+        Check passwords and yield results as they are delivered
+        
+        Passwords are hashed up front and deduplicated by digest, so each
+        distinct hash is looked up once however many rows repeat it; the
+        hashes are then grouped by their 5-character prefix, so each range
+        is fetched once. With a hash input_format the inputs are hex
+        digests (or raw digests as bytes) and are not hashed again.
+        
+        Every row still gets its own result. Rows whose hash appears more
+        than once carry 'occurrences' (rows sharing it), and all but the
+        first of them 'duplicate': True.
+        
+        With a repeat_counter, as when streaming with track_repeats, rows
+        are compared with every row the counter has seen in earlier calls
+        too. Later rows are not known yet, so 'occurrences' is then the
+        number of rows with the hash so far, this one included.
         
         Args:
-            passwords (list): List of passwords to check
+            passwords (list): List of passwords (or hashes) to check
             show_progress (bool): Whether to show progress updates
+            repeat_counter (RepeatCounter): Counts repeats across calls
             
-        Returns:
-            list: Results with password status and breach counts
+        Yields:
+            tuple: (input index, result dict)
         """
-        results = []
+        passwords = list(passwords)
         total = len(passwords)
+        checked = 0
+        # Out-of-order results waiting for earlier indexes (ordered mode)
+        held = {}
+        next_index = 0
+        
+        digests = self._digests(passwords)
+        unique, positions = dedupe_digests(digests, self.mode)
+        # Rows of a hash seen so far, per row (0 for malformed hashes)
+        running = None
+        if repeat_counter is not None:
+            running = array('l', [0 if digest is None else repeat_counter.add(digest)
+                                  for digest in digests])
+        del digests
+        # The resolvers work on the packed digests; no per-hash strings are built
+        packed = unique.packed
+        # Rows sharing a hash are chained in input order: first[u], then
+        # following[row] until -1
+        first = array('l', [-1]) * len(unique)
+        following = array('l', [-1]) * total
+        occurrences = array('l', [0]) * len(unique)
+        for index in range(total - 1, -1, -1):
+            position = positions[index]
+            if position >= 0:
+                following[index] = first[position]
+                first[position] = index
+                occurrences[position] += 1
+        
+        if self.processes > 1:
+            resolved = self._resolved_by_processes(packed)
+            mode = f"{self.processes} processes"
+        else:
+            resolved = self._resolved_by_threads(packed)
+            mode = f"{self.workers} worker{'s' if self.workers > 1 else ''}"
+        
+        def fan_out():
+            # (row index, breach count, error, occurrences, duplicate) per input row
+            if len(unique) < total:
+                for index, position in enumerate(positions):
+                    if position < 0:
+                        yield index, None, f"Not a valid {self.mode.upper()} hash", 1, False
+            for position, breach_count, error in resolved:
+                index = first[position]
+                duplicate = False
+                while index >= 0:
+                    if running is None:
+                        yield index, breach_count, error, occurrences[position], duplicate
+                    else:
+                        yield index, breach_count, error, running[index], running[index] > 1
+                    duplicate = True
+                    index = following[index]
         
         if show_progress:
-            print(f"🔍 Checking {total} passwords...")
+            print(f"🔍 Checking {total} passwords, {len(unique)} unique ({mode})...")
             print("-" * 40)
         
-        for i, password in enumerate(passwords, 1):
-            if show_progress and i % 10 == 0:
-                print(f"Progress: {i}/{total} passwords checked...")
+        # Progress is only reported from this thread, so counts stay
+        # correct however many workers are fetching
+        for index, breach_count, error, repeats, duplicate in fan_out():
+            checked += 1
+            password = passwords[index]
+            if isinstance(password, bytes):
+                # Raw digests are shown as hex, like hex hash inputs
+                password = password.hex().upper()
             
-            try:
-                breach_count = pwned_api_check(password)
+            if error is None:
                 status = "COMPROMISED" if breach_count else "SAFE"
-                
                 result = {
                     'password': password,
                     'status': status,
                     'breach_count': breach_count,
                     'checked_at': datetime.now().isoformat()
                 }
-                results.append(result)
                 
                 if show_progress:
                     emoji = "❌" if breach_count else "✅"
                     count_text = f"({breach_count} times)" if breach_count else ""
-                    print(f"{emoji} Password {i}: {status} {count_text}")
-                
-                # Rate limiting
-                if self.delay > 0:
-                    time.sleep(self.delay)
-                    
-            except Exception as e:
+                    print(f"{emoji} Password {index + 1}: {status} {count_text}")
+            else:
                 result = {
                     'password': password,
                     'status': 'ERROR',
                     'breach_count': None,
-                    'error': str(e),
+                    'error': str(error),
                     'checked_at': datetime.now().isoformat()
                 }
-                results.append(result)
                 
                 if show_progress:
-                    print(f"❌ Password {i}: ERROR - {e}")
+                    print(f"❌ Password {index + 1}: ERROR - {error}")
+            
+            if repeats > 1:
+                result['occurrences'] = repeats
+                if duplicate:
+                    result['duplicate'] = True
+            
+            if show_progress and checked % 10 == 0:
+                print(f"Progress: {checked}/{total} passwords checked...")
+            
+            if not self.ordered:
+                yield index, result
+                continue
+            held[index] = result
+            while next_index in held:
+                yield next_index, held.pop(next_index)
+                next_index += 1
+    
+    def check_passwords_from_list(self, passwords, show_progress=True):
+        """
+        Check a list of passwords for breaches
         
+        Args:
+            passwords (list): List of passwords to check
+            show_progress (bool): Whether to show progress updates
+            
+        Returns:
+            list: Results with password status and breach counts, in input order
+        """
+        passwords = list(passwords)
+        results = [None] * len(passwords)
+        for index, result in self.iter_results(passwords, show_progress):
+            results[index] = result
         return results
     
+    def iter_passwords_from_file(self, filename, start_offset=0, with_offsets=False):
+        """
+        Lazily yield passwords from a text file, one per line
+        
+        Lines are read through a large buffer and never held all at once.
+        Bytes that are not valid UTF-8 are kept via surrogateescape, so
+        such passwords still hash to their original bytes.
+        
+        Args:
+            filename (str): Path to file containing passwords (one per line)
+            start_offset (int): Byte offset to start reading from
+            with_offsets (bool): Also yield the byte offset just past each line
+            
+        Yields:
+            str: Each non-empty, stripped line (or (offset, line) pairs)
+        """
+        with open(filename, 'rb', buffering=READ_BUFFER_SIZE) as f:
+            f.seek(start_offset)
+            offset = start_offset
+            for line in f:
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                password = line.decode('utf-8', errors='surrogateescape')
+                yield (offset, password) if with_offsets else password
+    
+    def iter_raw_hashes_from_file(self, filename, start_offset=0, with_offsets=False):
+        """
+        Lazily yield digests from a file of raw fixed-width binary digests
+        
+        The file is read in large blocks and the digests are yielded as
+        they are; they are only hex-encoded for display in the results.
+        
+        Args:
+            filename (str): Path to a file of concatenated 20-byte SHA-1 or
+                16-byte NTLM digests
+            start_offset (int): Byte offset to start reading from
+            with_offsets (bool): Also yield the byte offset just past each digest
+            
+        Yields:
+            bytes: Each raw digest (or (offset, digest) pairs)
+        """
+        size = HASH_LENGTHS[self.hash_mode] // 2
+        block_size = READ_BUFFER_SIZE - READ_BUFFER_SIZE % size
+        with open(filename, 'rb', buffering=0) as f:
+            f.seek(start_offset)
+            offset = start_offset
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    return
+                if len(block) % size:
+                    raise ValueError(f"{filename} ends with a partial {size}-byte digest")
+                for start in range(0, len(block), size):
+                    offset += size
+                    digest = block[start:start + size]
+                    yield (offset, digest) if with_offsets else digest
+    
+    def iter_inputs_from_file(self, filename, start_offset=0, with_offsets=False):
+        """Yield passwords or hashes from a file according to input_format"""
+        if self.input_format.endswith('-raw'):
+            return self.iter_raw_hashes_from_file(filename, start_offset, with_offsets)
+        return self.iter_passwords_from_file(filename, start_offset, with_offsets)
+    
+    def check_passwords_stream(self, passwords, sink, chunk_size=DEFAULT_CHUNK_SIZE,
+                               show_progress=True, on_chunk=None, track_repeats=False):
+        """
+        Check an iterable of passwords in bounded memory
+        
+        Passwords flow through hash -> lookup -> sink one chunk at a time,
+        so peak memory depends on chunk_size rather than the input size.
+        Prefix grouping (one range request per prefix) and deduplication
+        ('occurrences' / 'duplicate') apply per chunk, unless track_repeats
+        keeps a RepeatCounter across chunks (about 30 bytes per distinct
+        hash; see iter_results).
+        
+        Args:
+            passwords (iterable): Passwords to check, consumed lazily
+            sink (callable): Called with each result dict as it completes,
+                e.g. a result_sinks.ResultSink
+            chunk_size (int): Passwords hashed and grouped at a time
+            show_progress (bool): Whether to show progress updates
+            on_chunk (callable): Called with the running total after each chunk
+            track_repeats (bool): Recognise repeats across chunks
+            
+        Returns:
+            int: Number of results passed to the sink
+        """
+        checked = 0
+        passwords = iter(passwords)
+        repeat_counter = RepeatCounter(self.mode) if track_repeats else None
+        while True:
+            chunk = list(itertools.islice(passwords, chunk_size))
+            if not chunk:
+                break
+            for _, result in self.iter_results(chunk, show_progress=False,
+                                               repeat_counter=repeat_counter):
+                sink(result)
+                checked += 1
+            if on_chunk:
+                on_chunk(checked)
+            if show_progress:
+                print(f"Progress: {checked:,} passwords checked...")
+        return checked
+    
     def check_passwords_from_file(self, filename):
         """
         Read passwords from a text file and check them
@@ -97,8 +797,7 @@ class BatchPasswordChecker:
             list: Results with password status and breach counts
         """
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                passwords = [line.strip() for line in f if line.strip()]
+            passwords = list(self.iter_inputs_from_file(filename))
             
             print(f"📁 Loaded {len(passwords)} passwords from {filename}")
             return self.check_passwords_from_list(passwords)
@@ -110,80 +809,177 @@ class BatchPasswordChecker:
             print(f"❌ Error reading file: {e}")
             return []
     
-    def generate_report(self, results, output_file=None):
+    def stream_passwords_from_file(self, filename, output, chunk_size=DEFAULT_CHUNK_SIZE,
+                                   checkpoint_file=None, resume=False,
+                                   checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+                                   format=None, compression=None, track_repeats=False):
         """
-        Generate a summary report of the password check results
+        Check a password file of any size, writing results as they complete
+        
+        Unlike check_passwords_from_file, results are not kept in memory:
+        each one goes to a result sink (see result_sinks) as soon as it
+        completes. The sink is flushed periodically and after every chunk,
+        so the output can be inspected while the audit runs.
+        
+        Progress (input byte offset, output size and the running report
+        aggregates) is checkpointed durably at chunk boundaries. With
+        resume=True a run that died part-way continues from its last
+        checkpoint: the output is truncated back to the checkpointed size
+        and appended to.
+        
+        self.report is a ReportAggregator covering the whole audit
+        (including resumed work); pass it to generate_report() at any point.
+        
+        Repeats are recognised within each chunk, which keeps memory flat;
+        the report's top list still merges a password seen in several
+        chunks, but leaves out unique and reuse counts. track_repeats=True
+        recognises them across the whole file with a RepeatCounter (about
+        30 bytes per distinct hash), so rows carry 'occurrences' so far (see
+        iter_results) and the report counts unique and reused passwords.
+        The counter is saved next to the checkpoint, so a resumed run picks
+        it up without re-reading the input.
         
         Args:
-            results (list): Results from password checking
-            output_file (str): Optional file to save the report
+            filename (str): Path to file containing passwords (one per line)
+            output (str): Results file; format and compression are inferred
+                from its name (results.csv, results.jsonl.gz, results.bin.zst)
+            chunk_size (int): Passwords hashed and grouped at a time
+            checkpoint_file (str): Checkpoint path (default: output + '.checkpoint')
+            resume (bool): Continue from an existing checkpoint (ValueError
+                if there is none)
+            checkpoint_interval (float): Minimum seconds between checkpoints
+            format (str): 'csv', 'jsonl' or 'binary' instead of inferring it
+            compression (str): 'gzip' or 'zstd' instead of inferring it
+            track_repeats (bool): Recognise repeats across the whole file
+            
+        Returns:
+            int: Number of passwords checked (including resumed work)
         """
-        if not results:
-            print("No results to report")
-            return
+        checkpoint_file = checkpoint_file or output + '.checkpoint'
         
-        # Calculate statistics
-        total = len(results)
-        compromised = sum(1 for r in results if r['status'] == 'COMPROMISED')
-        safe = sum(1 for r in results if r['status'] == 'SAFE')
-        errors = sum(1 for r in results if r['status'] == 'ERROR')
+        try:
+            input_size = os.path.getsize(filename)
+        except FileNotFoundError:
+            print(f"❌ Error: File '{filename}' not found")
+            return 0
         
-        # Find most compromised passwords
-        compromised_results = [r for r in results if r['status'] == 'COMPROMISED']
-        if compromised_results:
-            most_compromised = max(compromised_results, key=lambda x: x['breach_count'])
+        state = load_checkpoint(checkpoint_file) if resume else None
+        if resume and state is None:
+            # Starting over would truncate whatever results are already there
+            raise ValueError(f"No checkpoint {checkpoint_file} to resume from")
+        if state is not None:
+            if state['input'] != os.path.abspath(filename) or state['input_size'] != input_size:
+                raise ValueError(f"Checkpoint {checkpoint_file} belongs to a different input file")
+            if state.get('input_format', 'plaintext') != self.input_format:
+                raise ValueError(f"Checkpoint {checkpoint_file} was made with input format "
+                                 f"{state.get('input_format', 'plaintext')!r}")
+            if state.get('track_repeats', False) != track_repeats:
+                raise ValueError(f"Checkpoint {checkpoint_file} was made with "
+                                 f"track_repeats={state.get('track_repeats', False)}")
+            if 'report' in state:
+                self.report = ReportAggregator.from_state(state['report'])
+            else:
+                # Checkpoints from before report aggregation only kept counts
+                self.report = ReportAggregator()
+                self.report.counts.update(state['status_counts'])
+            if state['complete']:
+                print(f"✅ {filename} was already fully checked ({state['checked']:,} passwords)")
+                return state['checked']
+            # Drop rows written after the last checkpoint; they are redone
+            with open(output, 'r+b') as out:
+                out.truncate(state['output_size'])
+            print(f"⏩ Resuming after {state['checked']:,} passwords")
         else:
-            most_compromised = None
-        
-        # Generate report
-        report = []
-        report.append("🔐 BATCH PASSWORD SECURITY REPORT")
-        report.append("=" * 50)
-        report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append("")
-        
-        report.append("📊 SUMMARY STATISTICS")
-        report.append("-" * 30)
-        report.append(f"Total Passwords Checked: {total}")
-        report.append(f"✅ Safe Passwords: {safe} ({safe/total*100:.1f}%)")
-        report.append(f"❌ Compromised Passwords: {compromised} ({compromised/total*100:.1f}%)")
-        report.append(f"⚠️  Errors: {errors} ({errors/total*100:.1f}%)")
-        report.append("")
+            state = {
+                'input': os.path.abspath(filename),
+                'input_size': input_size,
+                'input_format': self.input_format,
+                'offset': 0,
+                'checked': 0,
+                'output_size': 0,
+                'complete': False,
+                'track_repeats': track_repeats,
+            }
+            self.report = ReportAggregator(distinct=track_repeats)
         
-        if most_compromised:
-            report.append("🚨 MOST COMPROMISED PASSWORD")
-            report.append("-" * 30)
-            report.append(f"Password: {most_compromised['password']}")
-            report.append(f"Found in breaches: {most_compromised['breach_count']:,} times")
-            report.append("")
+        report = self.report
+        repeat_counter = None
+        if track_repeats:
+            if state.get('repeats_file'):
+                repeat_counter = RepeatCounter.load(state['repeats_file'], self.mode)
+            else:
+                repeat_counter = RepeatCounter(self.mode)
+        # The counter alternates between two files, so the one the saved
+        # checkpoint refers to survives a crash while the other is written
+        repeats_files = (checkpoint_file + '.repeats0', checkpoint_file + '.repeats1')
+        last_checkpoint = time.monotonic()
         
-        # Top 10 most compromised passwords
-        if compromised_results:
-            top_compromised = sorted(compromised_results, 
-                                   key=lambda x: x['breach_count'], 
-                                   reverse=True)[:10]
+        with open_sink(output, format, compression, append=resume and state['checked'] > 0,
+                       fsync_interval=None) as sink:
             
-            report.append("🔝 TOP 10 MOST COMPROMISED PASSWORDS")
-            report.append("-" * 40)
-            for i, result in enumerate(top_compromised, 1):
-                report.append(f"{i:2d}. {result['password']} ({result['breach_count']:,} times)")
-            report.append("")
+            def checkpoint():
+                # The sink ends any compressed frame here, so the saved size
+                # is a clean point to truncate back to
+                state['output_size'] = sink.sync()
+                state['status_counts'] = dict(report.counts)
+                state['report'] = report.to_state()
+                if repeat_counter is not None and not state['complete']:
+                    path = repeats_files[1] if state.get('repeats_file') == repeats_files[0] \
+                        else repeats_files[0]
+                    repeat_counter.save(path)
+                    state['repeats_file'] = path
+                else:
+                    state.pop('repeats_file', None)
+                save_checkpoint(checkpoint_file, state)
+            
+            entries = self.iter_inputs_from_file(
+                filename, start_offset=state['offset'], with_offsets=True)
+            while True:
+                chunk = list(itertools.islice(entries, chunk_size))
+                if not chunk:
+                    break
+                for _, result in self.iter_results([p for _, p in chunk], show_progress=False,
+                                                   repeat_counter=repeat_counter):
+                    sink.write(result)
+                    report.add(result, running=repeat_counter is not None)
+                state['offset'] = chunk[-1][0]
+                state['checked'] += len(chunk)
+                sink.flush()
+                
+                if time.monotonic() - last_checkpoint >= checkpoint_interval:
+                    checkpoint()
+                    last_checkpoint = time.monotonic()
+                print(f"Progress: {state['checked']:,} passwords checked "
+                      f"({state['offset'] / max(input_size, 1) * 100:.1f}%)...")
+            
+            state['complete'] = True
+            checkpoint()
+        # A finished audit never resumes, so the counter is not needed
+        for path in repeats_files:
+            if os.path.exists(path):
+                os.remove(path)
         
-        # Recommendations
-        report.append("💡 RECOMMENDATIONS")
-        report.append("-" * 20)
-        if compromised > 0:
-            report.append("🔴 URGENT: Change all compromised passwords immediately")
-            report.append("🔸 Use unique passwords for each account")
-            report.append("🔸 Consider using a password manager")
-            report.append("🔸 Enable two-factor authentication where possible")
-        else:
-            report.append("🟢 Great! No compromised passwords found")
-            report.append("🔸 Continue using strong, unique passwords")
-            report.append("🔸 Regular security checkups are recommended")
+        print(f"📊 Results for {state['checked']:,} passwords written to: {output}")
+        return state['checked']
+    
+    def generate_report(self, results, output_file=None):
+        """
+        Generate a summary report of the password check results
+        
+        Args:
+            results (list or ReportAggregator): Results from password
+                checking (aggregated in one pass), or an aggregator that was
+                fed while the run was in progress
+            output_file (str): Optional file to save the report
+        """
+        report = results if isinstance(results, ReportAggregator) else \
+            ReportAggregator().update(results)
+        if not report.total:
+            print("No results to report")
+            return
         
         # Print report
-        report_text = '\n'.join(report)
+        report_text = report.render()
         print(report_text)
         
         # Save to file if requested
@@ -208,23 +1004,60 @@ class BatchPasswordChecker:
             return
         
         try:
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                fieldnames = ['password', 'status', 'breach_count', 'checked_at']
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                
-                writer.writeheader()
+            with CSVSink(filename) as sink:
                 for result in results:
-                    # Only include fields that exist in the result
-                    row = {k: v for k, v in result.items() if k in fieldnames}
-                    writer.writerow(row)
+                    sink.write(result)
             
             print(f"📊 Results exported to: {filename}")
             
         except Exception as e:
             print(f"❌ Error exporting to CSV: {e}")
 
-def main():
-    """Demo the batch password checker"""
+def main(argv=None):
+    """Demo the batch password checker, or audit a file given on the command line"""
+    parser = argparse.ArgumentParser(description="Check a file of passwords against known breaches")
+    parser.add_argument('input', nargs='?',
+                        help="Password (or hash) file, one per line (omit for the demo)")
+    parser.add_argument('output', nargs='?',
+                        help="Results file (.csv, .jsonl or .bin, optionally .gz or .zst)")
+    parser.add_argument('--workers', type=int, default=1, help="Parallel range requests")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="Worker processes for hashing and local lookups")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted audit")
+    parser.add_argument('--track-repeats', action='store_true',
+                        help="Count repeated passwords across the whole file (memory grows "
+                             "with the number of distinct passwords)")
+    parser.add_argument('--metrics', help="Write Prometheus metrics to this file when done")
+    parser.add_argument('--format', choices=['csv', 'jsonl', 'binary'],
+                        help="Results format (default: from the output file name)")
+    parser.add_argument('--compress', choices=['gzip', 'zstd'],
+                        help="Compress results (default: from the output file name)")
+    parser.add_argument('--report', help="Also save the summary report to this file")
+    parser.add_argument('--input-format', choices=INPUT_FORMATS, default='plaintext',
+                        help="Input holds plaintext passwords (default), SHA-1 or NTLM hex "
+                             "hashes one per line, or raw binary digests (*-raw)")
+    args = parser.parse_args(argv)
+    
+    if args.input:
+        if not args.output:
+            parser.error("an output file is required when auditing a file")
+        registry = use_metrics(MetricsRegistry()) if args.metrics else None
+        checker = BatchPasswordChecker(workers=args.workers, processes=args.processes,
+                                       input_format=args.input_format)
+        try:
+            checker.stream_passwords_from_file(args.input, args.output, chunk_size=args.chunk_size,
+                                               checkpoint_file=args.checkpoint, resume=args.resume,
+                                               format=args.format, compression=args.compress,
+                                               track_repeats=args.track_repeats)
+            checker.generate_report(checker.report, args.report)
+        finally:
+            checker.close()
+            if registry is not None:
+                registry.write(args.metrics)
+        return
+    
     print("🔐 Batch Password Checker Demo")
     print("=" * 40)
     
@@ -241,7 +1074,7 @@ def main():
     ]
     
     # Initialize batch checker
-    checker = BatchPasswordChecker(delay=0.3)  # Small delay to be nice to API
+    checker = BatchPasswordChecker(max_rate=3)  # Gentle request rate to be nice to API
     
     # Run batch check
     print(f"Testing with {len(demo_passwords)} demo passwords...")
@@ -257,6 +1090,10 @@ def main():
     
     print("\n💡 To check passwords from a file:")
     print("   checker.check_passwords_from_file('passwords.txt')")
+    print("\n💡 To stream a file of any size straight to CSV:")
+    print("   checker.stream_passwords_from_file('passwords.txt', 'results.csv')")
+    print("\n💡 To check in parallel over one pooled connection:")
+    print("   BatchPasswordChecker(workers=8).check_passwords_from_list(passwords)")
     print("\n💡 To save report to file:")
     print("   checker.generate_report(results, 'security_report.txt')")
 
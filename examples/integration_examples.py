@@ -15,6 +15,7 @@
 # sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # from password_checker import pwned_api_check
+# from password_strength import DIGIT, LENGTH, LOWER, SPECIAL, UPPER, strength_flags
 
 # class PasswordPolicy:
 #     """Example password policy enforcement with breach checking"""
@@ -27,7 +28,6 @@
 #         self.require_digit = require_digit
 #         self.require_special = require_special
 #         self.check_breaches = check_breaches
-#         self.special_chars = "!@#$%^&*()_+-=[]{}|;:,.<>?"
     
 #     def validate_password(self, password):
 #         """
@@ -44,33 +44,36 @@
 #             'strength_score': 0
 #         }
         
+#         # Every character is classified once by the shared strength engine
+#         flags = strength_flags(password, self.min_length)
+        
 #         # Length check
-#         if len(password) < self.min_length:
+#         if not flags & LENGTH:
 #             result['errors'].append(f"Password must be at least {self.min_length} characters long")
 #             result['valid'] = False
 #         else:
 #             result['strength_score'] += 1
         
 #         # Character requirements
-#         if self.require_upper and not any(c.isupper() for c in password):
+#         if self.require_upper and not flags & UPPER:
 #             result['errors'].append("Password must contain at least one uppercase letter")
 #             result['valid'] = False
 #         else:
 #             result['strength_score'] += 1
             
-#         if self.require_lower and not any(c.islower() for c in password):
+#         if self.require_lower and not flags & LOWER:
 #             result['errors'].append("Password must contain at least one lowercase letter")
 #             result['valid'] = False
 #         else:
 #             result['strength_score'] += 1
             
-#         if self.require_digit and not any(c.isdigit() for c in password):
+#         if self.require_digit and not flags & DIGIT:
 #             result['errors'].append("Password must contain at least one digit")
 #             result['valid'] = False
 #         else:
 #             result['strength_score'] += 1
             
-#         if self.require_special and not any(c in self.special_chars for c in password):
+#         if self.require_special and not flags & SPECIAL:
 #             result['errors'].append("Password must contain at least one special character")
 #             result['valid'] = False
 #         else:
@@ -1,67 +1,15 @@
 #You can run this file here using the terminal. 
 #You will also need to make sure you have installed the requests module from PyPi (pip install)
 
-import requests
-import hashlib
 import sys
 import getpass
 
-def request_api_data(query_char):
-    """Request data from HaveIBeenPwned API"""
-    url = 'https://api.pwnedpasswords.com/range/' + query_char
-    res = requests.get(url)
-    if res.status_code != 200:
-        raise RuntimeError(f'Error fetching: {res.status_code}, check the api and try again')
-    return res
-
-def get_password_leaks_count(hashes, hash_to_check):
-    """Parse API response to find password hash matches"""
-    hashes = (line.split(':') for line in hashes.text.splitlines())
-    for h, count in hashes:
-        if h == hash_to_check:
-            return count
-    return 0
-
-def pwned_api_check(password):
-    """Check if password exists in breached databases"""
-    # Create SHA1 hash of password
-    sha1password = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
-    # Split hash: send only first 5 chars to API (k-anonymity)
-    first5_char, tail = sha1password[:5], sha1password[5:]
-    response = request_api_data(first5_char)
-    return get_password_leaks_count(response, tail)
-
-def check_password_strength(password):
-    """Basic password strength indicators"""
-    strength_score = 0
-    feedback = []
-    
-    if len(password) >= 8:
-        strength_score += 1
-    else:
-        feedback.append("Use at least 8 characters")
-    
-    if any(c.islower() for c in password):
-        strength_score += 1
-    else:
-        feedback.append("Include lowercase letters")
-    
-    if any(c.isupper() for c in password):
-        strength_score += 1
-    else:
-        feedback.append("Include uppercase letters")
-    
-    if any(c.isdigit() for c in password):
-        strength_score += 1
-    else:
-        feedback.append("Include numbers")
-    
-    if any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
-        strength_score += 1
-    else:
-        feedback.append("Include special characters")
-    
-    return strength_score, feedback
+# Shares the range fetching (and the optional PWNED_CACHE_PATH disk cache)
+# with the command-line version
+from password_checker import pwned_api_check
+# Strength scoring is shared with the examples and password policies
+from password_strength import check_password_strength
+from strength_estimator import estimate_strength
 
 def main():
     print("🔐 Password Security Checker")
@@ -87,6 +35,8 @@ def main():
                 
                 # Check basic password strength
                 strength_score, feedback = check_password_strength(password)
+                # Estimate guesses from common words and patterns
+                estimate = estimate_strength(password)
                 
                 print("\n📊 RESULTS:")
                 print("-" * 20)
@@ -107,9 +57,17 @@ def main():
                 else:
                     print("🔴 Weak password structure")
                 
-                if feedback:
+                print(f"\n🧮 Estimated guesses: 10^{estimate['guesses_log10']:.1f} "
+                      f"(score {estimate['score']}/4)")
+                print(f"   Offline attack (fast hash): {estimate['crack_times_display']['offline_fast_hashing']}")
+                print(f"   Online attack (throttled): {estimate['crack_times_display']['online_throttled']}")
+                if estimate['warning']:
+                    print(f"⚠️  {estimate['warning']}")
+                
+                tips = feedback + [tip for tip in estimate['suggestions'] if tip not in feedback]
+                if tips:
                     print("\n💡 Suggestions to improve:")
-                    for tip in feedback:
+                    for tip in tips:
                         print(f"   • {tip}")
                 
                 print("\n" + "="*50)
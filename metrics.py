@@ -0,0 +1,188 @@
+"""
+Metrics
+
+Opt-in counters and latency histograms for the lookup hot path, exported
+programmatically (snapshot()) or in the Prometheus text exposition format,
+either written to a file or served from a local HTTP endpoint.
+
+Nothing is recorded unless a registry is installed with
+password_checker.use_metrics(); with none installed, the instrumented code
+only pays for an `is None` check.
+
+Recorded metrics (all prefixed with the registry namespace, "pwned_"):
+    phase_seconds{phase}              time spent per phase: hash, dedupe,
+                                      group, rate_limit_wait, request,
+                                      transfer, parse, backoff
+    http_requests_total{status}       range responses by status code
+    http_response_bytes_total         range response body bytes
+    cache_lookups_total{cache,result} memory/disk cache and prefilter outcomes
+    retries_total{reason}             retried requests by status or error
+    errors_total{reason}              failed requests by status or error
+    coalesced_requests_total          range fetches shared with one already
+                                      in flight
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+HELP = {
+    'phase_seconds': 'Seconds spent in each lookup phase',
+    'http_requests_total': 'Range API responses by status code',
+    'http_response_bytes_total': 'Range API response body bytes received',
+    'cache_lookups_total': 'Cache and prefilter lookups by outcome',
+    'retries_total': 'Range requests retried, by status code or error',
+    'errors_total': 'Range requests that failed, by status code or error',
+    'coalesced_requests_total': 'Range fetches served by joining one already in flight',
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self, namespace='pwned', buckets=DEFAULT_BUCKETS):
+        """
+        Thread-safe store of labelled counters and histograms
+
+        Args:
+            namespace (str): Prefix added to every exported metric name
+            buckets (tuple): Histogram upper bounds in seconds, ascending
+        """
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # (name, sorted label pairs) -> value
+        self._counters = {}
+        # (name, sorted label pairs) -> [per-bucket counts..., +Inf count, sum]
+        self._histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        """Add amount to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record one histogram observation"""
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def value(self, name, **labels):
+        """Current value of a counter (0 if never incremented)"""
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """
+        Return every metric as plain data
+
+        Returns:
+            dict: {'counters': {name: [(labels, value)]}, 'histograms':
+            {name: [(labels, {'count', 'sum', 'buckets': {bound: cumulative}})]}}
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(series) for key, series in self._histograms.items()}
+        result = {'counters': {}, 'histograms': {}}
+        for (name, labels), value in sorted(counters.items()):
+            result['counters'].setdefault(name, []).append((dict(labels), value))
+        for (name, labels), series in sorted(histograms.items()):
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                buckets[bound] = cumulative
+            result['histograms'].setdefault(name, []).append(
+                (dict(labels), {'count': cumulative, 'sum': series[-1], 'buckets': buckets}))
+        return result
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        for kind, families in (('counter', snapshot['counters']),
+                               ('histogram', snapshot['histograms'])):
+            for name, series in families.items():
+                full = f'{self.namespace}_{name}' if self.namespace else name
+                lines.append(f'# HELP {full} {HELP.get(name, name)}')
+                lines.append(f'# TYPE {full} {kind}')
+                for labels, value in series:
+                    pairs = sorted(labels.items())
+                    if kind == 'counter':
+                        lines.append(f'{full}{_format_labels(pairs)} {_format_value(value)}')
+                        continue
+                    for bound, count in value['buckets'].items():
+                        le = _format_labels(pairs, [('le', _format_value(bound))])
+                        lines.append(f'{full}_bucket{le} {count}')
+                    lines.append(f'{full}_sum{_format_labels(pairs)} {_format_value(value["sum"])}')
+                    lines.append(f'{full}_count{_format_labels(pairs)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Atomically write the exposition text, e.g. for node_exporter's textfile collector"""
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port=9464, host='127.0.0.1'):
+        """
+        Serve /metrics from a background thread
+
+        Returns:
+            ThreadingHTTPServer: call shutdown() to stop it
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
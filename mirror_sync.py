@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Mirror Sync
+
+Downloads every one of the 16^5 hash-prefix ranges into a local range
+cache file, so audits can run fully offline against a recent copy.
+
+The mirror is an ordinary range_cache.DiskRangeCache file. Ranges fetched
+within --max-age are skipped, which makes an interrupted sync resumable:
+rerunning it picks up where it stopped. Older ranges are revalidated with
+their ETag, so a nightly refresh only downloads ranges that changed.
+
+Use the mirror by pointing the disk cache at it with an infinite TTL:
+    PWNED_CACHE_PATH=mirror.sqlite PWNED_CACHE_TTL=inf python password_checker.py ...
+
+Usage:
+    python mirror_sync.py mirror.sqlite --workers 64
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from password_checker import fetch_range, get_session, handle_range_response
+from range_cache import DEFAULT_TTL, DiskRangeCache
+
+PREFIX_COUNT = 16 ** 5
+DEFAULT_WORKERS = 32
+
+
+def all_prefixes():
+    """Yield every 5-char uppercase hex prefix in order"""
+    for i in range(PREFIX_COUNT):
+        yield f"{i:05X}"
+
+
+def sync_prefix(store, prefix, limiter=None):
+    """
+    Bring one range in the mirror up to date
+
+    Returns:
+        str: 'fresh' (skipped), 'unchanged' (304) or 'updated' (downloaded)
+    """
+    entry = store.get(prefix)
+    if entry is not None and entry.fresh:
+        return 'fresh'
+    headers = {'If-None-Match': entry.etag} if entry is not None and entry.etag else {}
+    res = fetch_range(prefix, headers, limiter)
+    # The same status, ETag and 304 handling as the disk cache, into the mirror
+    return 'updated' if handle_range_response(prefix, res, store=store) is res else 'unchanged'
+
+
+def sync_mirror(path, workers=DEFAULT_WORKERS, max_age=DEFAULT_TTL, prefixes=None,
+                report_interval=10.0, stream=sys.stderr):
+    """
+    Download or refresh every range into a local mirror
+
+    Args:
+        path (str): Mirror (SQLite range cache) file
+        workers (int): Range requests in flight at once
+        max_age (float): Skip ranges fetched less than this many seconds ago
+        prefixes (iterable): Prefixes to sync (default: all 16^5)
+        report_interval (float): Seconds between progress lines
+
+    Returns:
+        dict: Number of prefixes per outcome ('fresh', 'unchanged',
+        'updated', 'error')
+    """
+    store = DiskRangeCache(path, ttl=max_age)
+    get_session(pool_size=workers)
+    stats = {'fresh': 0, 'unchanged': 0, 'updated': 0, 'error': 0}
+    started = last_report = time.monotonic()
+    items = iter(prefixes if prefixes is not None else all_prefixes())
+
+    def report():
+        done = sum(stats.values())
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(f"{done:,} ranges - {stats['updated']:,} updated, {stats['unchanged']:,} unchanged, "
+              f"{stats['fresh']:,} skipped, {stats['error']:,} errors "
+              f"({done / elapsed:,.0f} ranges/s)", file=stream)
+
+    def sync(prefix):
+        try:
+            return sync_prefix(store, prefix)
+        except Exception as e:
+            print(f"❌ {prefix}: {e}", file=stream)
+            return 'error'
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(sync, prefix) for prefix in itertools.islice(items, workers * 2)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats[future.result()] += 1
+                    for prefix in itertools.islice(items, 1):
+                        pending.add(executor.submit(sync, prefix))
+                if time.monotonic() - last_report >= report_interval:
+                    last_report = time.monotonic()
+                    report()
+    finally:
+        store.close()
+    report()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mirror every Pwned Passwords range locally")
+    parser.add_argument('mirror', help="Mirror file (SQLite range cache) to create or refresh")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="Range requests in flight at once")
+    parser.add_argument('--max-age', type=float, default=DEFAULT_TTL,
+                        help="Skip ranges fetched less than this many seconds ago")
+    args = parser.parse_args(argv)
+
+    stats = sync_mirror(args.mirror, workers=args.workers, max_age=args.max_age)
+    if stats['error']:
+        print(f"⚠️  {stats['error']:,} ranges failed; rerun to retry them")
+        return 1
+    print(f"✅ Mirror {args.mirror} is up to date")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
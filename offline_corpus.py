@@ -0,0 +1,194 @@
+"""
+Offline Corpus
+
+Breach lookups against a local, memory-mapped copy of the Pwned Passwords
+hash list, for hosts that cannot reach api.pwnedpasswords.com.
+
+File layout (all integers little-endian except record counts):
+
+    header   magic, version, key size, count size, record count
+    index    16^5 + 1 uint64 record offsets, one per 5-hex-char prefix
+    records  sorted fixed-width (hash digest, big-endian uint32 count)
+
+Keys are 20-byte SHA-1 digests, or 16-byte NTLM hashes for an NTLM
+corpus. The prefix index gives an O(1) jump to the bucket for a hash; the
+bucket (about a thousand records for the full corpus) is then binary
+searched directly in the mapped pages, so the corpus is never loaded into
+memory.
+"""
+
+import mmap
+import struct
+from array import array
+
+MAGIC = b'PWNCORP1'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIQ')
+COUNT = struct.Struct('>I')
+PREFIX_BUCKETS = 16 ** 5
+INDEX_ENTRY = struct.Struct('<Q')
+SHA1_SIZE = 20
+NTLM_SIZE = 16
+
+
+class CorpusBucket:
+    """Records for one 5-char hash prefix, looked up by hex tail"""
+
+    def __init__(self, corpus, prefix, start, end):
+        self.corpus = corpus
+        self.prefix = prefix
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def get(self, tail, default=0):
+        digest = bytes.fromhex(self.prefix + tail)
+        count = self.corpus._search(digest, self.start, self.end)
+        return default if count is None else count
+
+
+class OfflineCorpus:
+    def __init__(self, path):
+        """
+        Memory-map a corpus file built by write_corpus
+
+        Args:
+            path (str): Path to the binary corpus file
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, key_size, count_size, records = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a password corpus file")
+        if count_size != COUNT.size:
+            self.close()
+            raise ValueError(f"Unsupported count size in {path}: {count_size}")
+
+        self.key_size = key_size
+        self.record_size = key_size + count_size
+        self.records = records
+        self._index_offset = HEADER.size
+        self._data_offset = HEADER.size + (PREFIX_BUCKETS + 1) * INDEX_ENTRY.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _bounds(self, bucket):
+        start = INDEX_ENTRY.unpack_from(self._mm, self._index_offset + bucket * INDEX_ENTRY.size)[0]
+        end = INDEX_ENTRY.unpack_from(self._mm, self._index_offset + (bucket + 1) * INDEX_ENTRY.size)[0]
+        return start, end
+
+    def _search(self, digest, lo, hi):
+        """Binary search records [lo, hi) for digest; return its count or None"""
+        mm = self._mm
+        key_size = self.key_size
+        record_size = self.record_size
+        base = self._data_offset
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = base + mid * record_size
+            key = mm[offset:offset + key_size]
+            if key < digest:
+                lo = mid + 1
+            elif key > digest:
+                hi = mid
+            else:
+                return COUNT.unpack_from(mm, offset + key_size)[0]
+        return None
+
+    def bucket(self, prefix):
+        """Return the CorpusBucket for a 5-char hex prefix"""
+        start, end = self._bounds(int(prefix, 16))
+        return CorpusBucket(self, prefix.upper(), start, end)
+
+    def lookup_digest(self, digest):
+        """Return the breach count for a raw hash digest (0 if absent)"""
+        # The first 20 bits of the digest are the 5-char prefix bucket
+        bucket = (digest[0] << 12) | (digest[1] << 4) | (digest[2] >> 4)
+        start, end = self._bounds(bucket)
+        count = self._search(digest, start, end)
+        return count or 0
+
+    def iter_digests(self):
+        """Yield every digest in the corpus, in sorted order"""
+        mm = self._mm
+        end = self._data_offset + self.records * self.record_size
+        for offset in range(self._data_offset, end, self.record_size):
+            yield mm[offset:offset + self.key_size]
+
+    def lookup(self, hex_hash):
+        """Return the breach count for a hex hash (0 if absent)"""
+        return self.lookup_digest(bytes.fromhex(hex_hash))
+
+
+def write_corpus(path, records, key_size=SHA1_SIZE):
+    """
+    Write a corpus file from records already sorted by digest
+
+    Args:
+        path (str): Output file path
+        records (iterable): Sorted (digest bytes, count) pairs
+        key_size (int): Digest width in bytes
+
+    Returns:
+        int: Number of records written
+    """
+    # Record offset of the first entry in each bucket, filled in as we go
+    index = array('Q', bytes(8 * (PREFIX_BUCKETS + 1)))
+    bucket = 0
+    written = 0
+    previous = None
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, key_size, COUNT.size, 0))
+        f.write(bytes(INDEX_ENTRY.size * (PREFIX_BUCKETS + 1)))
+
+        buffer = []
+        for digest, count in records:
+            if len(digest) != key_size:
+                raise ValueError(f"Expected {key_size}-byte digests, got {len(digest)}")
+            if previous is not None and digest <= previous:
+                raise ValueError("Records must be sorted by digest without duplicates")
+            previous = digest
+
+            record_bucket = (digest[0] << 12) | (digest[1] << 4) | (digest[2] >> 4)
+            while bucket < record_bucket:
+                bucket += 1
+                index[bucket] = written
+
+            buffer.append(digest)
+            buffer.append(COUNT.pack(min(count, 0xFFFFFFFF)))
+            written += 1
+            if len(buffer) >= 65536:
+                f.write(b''.join(buffer))
+                buffer = []
+        f.write(b''.join(buffer))
+
+        while bucket < PREFIX_BUCKETS:
+            bucket += 1
+            index[bucket] = written
+
+        if index.itemsize != INDEX_ENTRY.size:
+            raise RuntimeError("Unexpected array('Q') item size")
+        if struct.pack('=Q', 1) != INDEX_ENTRY.pack(1):
+            index.byteswap()
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, key_size, COUNT.size, written))
+        f.write(index.tobytes())
+
+    return written
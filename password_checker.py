@@ -1,28 +1,444 @@
 #You will not be able to run this file here and will need to copy it onto your computer and run it on your machine. 
 #You will also need to make sure you have installed the requests module from PyPi (pip install)
-import requests
 import hashlib
+import os
+from array import array
 import sys
+import threading
+import time
+import atexit
 
-def request_api_data(query_char):
-  url = 'https://api.pwnedpasswords.com/range/' + query_char
-  res = requests.get(url)
+from breach_filter import BreachFilter
+from digest_set import DigestSet
+from metrics import MetricsRegistry
+from offline_corpus import OfflineCorpus
+from rate_limiter import RETRY_STATUSES, AdaptiveRateLimiter, parse_retry_after
+from singleflight import Singleflight
+from range_cache import (DEFAULT_MEMORY_BUDGET, DEFAULT_TTL, CachedResponse,
+                         DiskRangeCache, MemoryRangeCache, RangeTable, pack_range)
+
+API_URL = os.environ.get('PWNED_API_URL', 'https://api.pwnedpasswords.com/range/')
+API_TIMEOUT = float(os.environ.get('PWNED_API_TIMEOUT', 10))
+DEFAULT_POOL_SIZE = 10
+# hex digest length per hash type; the range API serves NTLM with ?mode=ntlm
+HASH_LENGTHS = {'sha1': 40, 'ntlm': 32}
+
+_session = None
+_session_lock = threading.Lock()
+# requests pass through this unless a caller supplies its own limiter
+_rate_limiter = AdaptiveRateLimiter()
+
+_disk_cache = None
+_memory_cache = None
+_offline_corpus = None
+_ntlm_corpus = None
+_prefilter = None
+# phase timings and counters are only recorded while a registry is installed
+_metrics = None
+
+def record_coalesced(prefix):
+  if _metrics is not None:
+    _metrics.inc('coalesced_requests_total')
+
+# concurrent fetches of the same prefix share one upstream request
+_range_flights = Singleflight(on_coalesce=record_coalesced)
+
+def get_session(pool_size=DEFAULT_POOL_SIZE):
+  # one keep-alive session shared by every caller and thread, so connections
+  # (and their TLS handshakes) are reused instead of opened per request;
+  # requests is imported on first use, so lookups answered from the offline
+  # corpus or the disk cache never load the HTTP stack
+  import requests
+  global _session
+  with _session_lock:
+    if _session is None or _session.pool_size < pool_size:
+      session = requests.Session()
+      adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+      session.mount('https://', adapter)
+      session.mount('http://', adapter)
+      session.pool_size = pool_size
+      # close the smaller session's pool so its sockets aren't leaked
+      previous, _session = _session, session
+      if previous is not None:
+        previous.close()
+    return _session
+
+def use_rate_limiter(limiter):
+  # replace the process-wide limiter, e.g. AdaptiveRateLimiter(rate=20, max_rate=50)
+  global _rate_limiter
+  _rate_limiter = limiter or AdaptiveRateLimiter()
+  return _rate_limiter
+
+def enable_disk_cache(path, ttl=DEFAULT_TTL):
+  # opt in to the on-disk range cache; pass path=None to turn it off again
+  global _disk_cache
+  if _disk_cache is not None:
+    _disk_cache.close()
+  _disk_cache = DiskRangeCache(path, ttl) if path else None
+  return _disk_cache
+
+def enable_memory_cache(max_bytes=DEFAULT_MEMORY_BUDGET):
+  # process-wide LRU of parsed ranges; pass max_bytes=None to turn it off again
+  global _memory_cache
+  _memory_cache = MemoryRangeCache(max_bytes) if max_bytes else None
+  return _memory_cache
+
+def current_memory_cache():
+  return _memory_cache
+
+def use_offline_corpus(path, mode='sha1'):
+  # answer lookups from a local memory-mapped corpus instead of the API;
+  # NTLM hashes get their own corpus, built with 16-byte keys
+  global _offline_corpus, _ntlm_corpus
+  corpus = OfflineCorpus(path) if path else None
+  if corpus is not None and corpus.key_size * 2 != HASH_LENGTHS[mode]:
+    corpus.close()
+    raise ValueError(f'{path} holds {corpus.key_size}-byte keys, not {mode} hashes')
+  previous = _ntlm_corpus if mode == 'ntlm' else _offline_corpus
+  if previous is not None:
+    previous.close()
+  if mode == 'ntlm':
+    _ntlm_corpus = corpus
+  else:
+    _offline_corpus = corpus
+  return corpus
+
+def use_prefilter(path):
+  # consult a breach filter first so most safe passwords skip the exact lookup
+  global _prefilter
+  if _prefilter is not None:
+    _prefilter.close()
+  _prefilter = BreachFilter(path) if path else None
+  return _prefilter
+
+def use_metrics(registry):
+  # start recording into a metrics.MetricsRegistry; pass None to stop again
+  global _metrics
+  _metrics = registry
+  return _metrics
+
+def current_metrics():
+  return _metrics
+
+def backend_config():
+  # enough to reproduce this process's lookup backends in a worker process
+  return {
+    'disk_cache': (_disk_cache.path, _disk_cache.ttl) if _disk_cache is not None else None,
+    'memory_cache': _memory_cache.max_bytes if _memory_cache is not None else None,
+    'offline_corpus': _offline_corpus.path if _offline_corpus is not None else None,
+    'ntlm_corpus': _ntlm_corpus.path if _ntlm_corpus is not None else None,
+    'prefilter': _prefilter.path if _prefilter is not None else None,
+  }
+
+def apply_backend_config(config):
+  # worker process initializer; a forked worker must not reuse the parent's
+  # keep-alive sockets, so it opens its own session
+  global _session
+  _session = None
+  disk_cache = config.get('disk_cache')
+  if disk_cache:
+    enable_disk_cache(*disk_cache)
+  else:
+    enable_disk_cache(None)
+  enable_memory_cache(config.get('memory_cache'))
+  use_offline_corpus(config.get('offline_corpus'))
+  use_offline_corpus(config.get('ntlm_corpus'), 'ntlm')
+  use_prefilter(config.get('prefilter'))
+
+def cache_key(query_char, mode='sha1'):
+  # NTLM ranges are cached apart from the SHA-1 range with the same prefix
+  return query_char if mode == 'sha1' else f'{mode}:{query_char}'
+
+def cached_range_response(query_char, mode='sha1'):
+  # (fresh cached response or None, headers for a conditional request)
+  if _disk_cache is None:
+    return None, {}
+  entry = _disk_cache.get(cache_key(query_char, mode))
+  if _metrics is not None:
+    result = 'miss' if entry is None else 'hit' if entry.fresh else 'stale'
+    _metrics.inc('cache_lookups_total', cache='disk', result=result)
+  if entry is None:
+    return None, {}
+  if entry.fresh:
+    return CachedResponse(entry.blob, entry.etag), {}
+  return None, {'If-None-Match': entry.etag} if entry.etag else {}
+
+def handle_range_response(query_char, res, mode='sha1', store=None):
+  # check an API response and keep the disk cache (or another range store,
+  # such as a mirror) in step with it; a 304 returns the stored range
+  if store is None:
+    store = _disk_cache
+  key = cache_key(query_char, mode)
+  if res.status_code == 304 and store is not None:
+    entry = store.get(key)
+    if entry is not None:
+      store.touch(key)
+      return CachedResponse(entry.blob, entry.etag)
   if res.status_code != 200:
+    if _metrics is not None:
+      _metrics.inc('errors_total', reason=str(res.status_code))
     raise RuntimeError(f'Error fetching: {res.status_code}, check the api and try again')
+  if store is not None:
+    store.put(key, pack_range(res.content), res.headers.get('ETag'))
   return res
 
+def range_url(query_char, mode='sha1'):
+  return API_URL + query_char + ('' if mode == 'sha1' else f'?mode={mode}')
+
+def record_response(res, waited, elapsed):
+  # split a request's time into rate limiter wait, time to response headers
+  # (DNS, connect, TLS and server time) and body transfer
+  metrics = _metrics
+  if metrics is None:
+    return
+  to_headers = min(res.elapsed.total_seconds(), elapsed)
+  metrics.observe('phase_seconds', waited, phase='rate_limit_wait')
+  metrics.observe('phase_seconds', to_headers, phase='request')
+  metrics.observe('phase_seconds', elapsed - to_headers, phase='transfer')
+  metrics.inc('http_requests_total', status=str(res.status_code))
+  metrics.inc('http_response_bytes_total', len(res.content))
+
+def record_retry(reason, delay, failed=False):
+  metrics = _metrics
+  if metrics is None:
+    return
+  if failed:
+    metrics.inc('errors_total', reason=reason)
+  else:
+    metrics.inc('retries_total', reason=reason)
+    metrics.observe('phase_seconds', delay, phase='backoff')
+
+def fetch_range(query_char, headers=None, limiter=None, mode='sha1'):
+  # one range request through the rate limiter, retrying throttled and
+  # failed attempts; the response is returned without checking its status
+  import requests
+  limiter = limiter or _rate_limiter
+  url = range_url(query_char, mode)
+  attempt = 0
+  while True:
+    queued = time.perf_counter()
+    limiter.acquire()
+    started = time.perf_counter()
+    try:
+      res = get_session().get(url, headers=headers or {}, timeout=API_TIMEOUT)
+    except requests.RequestException as e:
+      if attempt >= limiter.max_retries:
+        record_retry(type(e).__name__, 0, failed=True)
+        raise
+      delay = limiter.backoff(attempt)
+      record_retry(type(e).__name__, delay)
+      time.sleep(delay)
+      attempt += 1
+      continue
+    record_response(res, started - queued, time.perf_counter() - started)
+    if res.status_code in RETRY_STATUSES and attempt < limiter.max_retries:
+      retry_after = parse_retry_after(res.headers.get('Retry-After'))
+      delay = limiter.on_throttle(attempt, retry_after)
+      record_retry(str(res.status_code), delay)
+      time.sleep(delay)
+      attempt += 1
+      continue
+    if res.status_code in (200, 304):
+      limiter.on_success()
+    return res
+
+def request_api_data(query_char, limiter=None, mode='sha1'):
+  cached, headers = cached_range_response(query_char, mode)
+  if cached is not None:
+    return cached
+  res = fetch_range(query_char, headers, limiter, mode)
+  return handle_range_response(query_char, res, mode)
+
+def current_rate_limiter():
+  return _rate_limiter
+
+def current_range_flights():
+  # the Singleflight shared by range fetches, for its calls/coalesced counters
+  return _range_flights
+
+def hash_password(password):
+  # surrogateescape round-trips undecodable input bytes read from files
+  return hashlib.sha1(password.encode('utf-8', 'surrogateescape')).hexdigest().upper()
+
+def password_digest(password):
+  # raw 20-byte SHA-1, half the size of the hex form
+  return hashlib.sha1(password.encode('utf-8', 'surrogateescape')).digest()
+
+def hex_digest(value, mode='sha1'):
+  # raw digest of a hex hash, or None if it isn't a valid one
+  length = HASH_LENGTHS[mode]
+  if len(value) != length:
+    return None
+  try:
+    digest = bytes.fromhex(value)
+  except ValueError:
+    return None
+  return digest if len(digest) * 2 == length else None
+
+def dedupe_digests(digests, mode='sha1'):
+  # (DigestSet of the distinct digests in first-seen order, per input the
+  # position of its digest in that set or -1 for None); the set packs the
+  # digests into one buffer, so a million distinct hashes cost about 30MB
+  # instead of a dict of bytes objects
+  started = time.perf_counter()
+  seen = DigestSet(HASH_LENGTHS[mode] // 2)
+  add = seen.add
+  positions = array('l', [-1 if digest is None else add(digest) for digest in digests])
+  if _metrics is not None:
+    _metrics.observe('phase_seconds', time.perf_counter() - started, phase='dedupe')
+  return seen, positions
+
+def definitely_not_breached(sha1password):
+  # True only when a prefilter is loaded and rules the hash out
+  if _prefilter is None:
+    return False
+  return digest_not_breached(bytes.fromhex(sha1password))
+
+def digest_not_breached(digest):
+  # definitely_not_breached for a raw SHA-1 digest
+  if _prefilter is None:
+    return False
+  ruled_out = not _prefilter.might_contain(digest)
+  if _metrics is not None:
+    _metrics.inc('cache_lookups_total', cache='prefilter', result='miss' if ruled_out else 'maybe')
+  return ruled_out
+
 def get_password_leaks_count(hashes, hash_to_check):
-  hashes = (line.split(':') for line in hashes.text.splitlines())
-  for h, count in hashes:
-    if h == hash_to_check:
-      return count
-  return 0
+  # cached responses are already packed; otherwise one find over the raw
+  # bytes - a 35-char suffix followed by ':' can only match at a line start
+  blob = getattr(hashes, 'blob', None)
+  if blob is not None:
+    return RangeTable(blob).get(hash_to_check, 0)
+  body = hashes.content
+  start = body.find(hash_to_check.upper().encode('ascii') + b':')
+  if start < 0:
+    return 0
+  start += len(hash_to_check) + 1
+  end = body.find(b'\n', start)
+  return int(body[start:end if end >= 0 else len(body)])
+
+def parse_range_response(hashes):
+  # parse a range response once into a compact table that many tails can
+  # be resolved against
+  blob = getattr(hashes, 'blob', None)
+  if blob is not None:
+    return RangeTable(blob)
+  if _metrics is None:
+    return RangeTable.from_content(hashes.content)
+  started = time.perf_counter()
+  table = RangeTable.from_content(hashes.content)
+  _metrics.observe('phase_seconds', time.perf_counter() - started, phase='parse')
+  return table
+
+def cached_range(first5_char, mode='sha1'):
+  if _memory_cache is None:
+    return None
+  leaks = _memory_cache.get(cache_key(first5_char, mode))
+  if _metrics is not None:
+    _metrics.inc('cache_lookups_total', cache='memory', result='miss' if leaks is None else 'hit')
+  return leaks
+
+def remember_range(first5_char, leaks, mode='sha1'):
+  if _memory_cache is not None:
+    _memory_cache.put(cache_key(first5_char, mode), leaks)
+
+def offline_corpus(mode='sha1'):
+  return _ntlm_corpus if mode == 'ntlm' else _offline_corpus
+
+def offline_bucket(first5_char, mode='sha1'):
+  corpus = offline_corpus(mode)
+  if corpus is None:
+    return None
+  return corpus.bucket(first5_char)
+
+def fetch_parsed_range(first5_char, limiter=None, mode='sha1'):
+  leaks = parse_range_response(request_api_data(first5_char, limiter, mode))
+  remember_range(first5_char, leaks, mode)
+  return leaks
+
+def get_range(first5_char, limiter=None, mode='sha1'):
+  # parsed {tail: count} for a prefix, served from the memory cache when enabled;
+  # callers missing the cache at the same time wait on a single fetch
+  bucket = offline_bucket(first5_char, mode)
+  if bucket is not None:
+    return bucket
+  leaks = cached_range(first5_char, mode)
+  if leaks is None:
+    leaks = _range_flights.do(cache_key(first5_char, mode), fetch_parsed_range,
+                              first5_char, limiter, mode)
+  return leaks
+
+def lookup_local(hex_hash, mode='sha1'):
+  # breach count when it can be answered without a range fetch, otherwise None;
+  # the prefilter only covers SHA-1
+  if mode == 'sha1' and definitely_not_breached(hex_hash):
+    return 0
+  corpus = offline_corpus(mode)
+  if corpus is not None:
+    return corpus.lookup(hex_hash)
+  return None
 
 def pwned_api_check(password):
-  sha1password = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+  if _metrics is None:
+    sha1password = hash_password(password)
+  else:
+    started = time.perf_counter()
+    sha1password = hash_password(password)
+    _metrics.observe('phase_seconds', time.perf_counter() - started, phase='hash')
+  count = lookup_local(sha1password)
+  if count is not None:
+    return count
   first5_char, tail = sha1password[:5], sha1password[5:]
-  response = request_api_data(first5_char)
-  return get_password_leaks_count(response, tail)
+  return get_range(first5_char).get(tail, 0)
+
+def group_by_prefix(passwords):
+  # hash everything up front so each 5-char prefix is only requested once
+  started = time.perf_counter()
+  groups = {}
+  for index, password in enumerate(passwords):
+    sha1password = hash_password(password)
+    groups.setdefault(sha1password[:5], []).append((index, sha1password[5:]))
+  if _metrics is not None:
+    _metrics.observe('phase_seconds', time.perf_counter() - started, phase='group')
+  return groups
+
+def is_hex_hash(value, mode='sha1'):
+  return hex_digest(value, mode) is not None
+
+def group_digests(packed, mode='sha1'):
+  # like group_by_prefix for raw digests packed end to end, as from a
+  # DigestSet: {prefix: array of digest indexes}; only the indexes are kept,
+  # and digest_tail() reads a tail back when it is looked up
+  started = time.perf_counter()
+  size = HASH_LENGTHS[mode] // 2
+  groups = {}
+  for index, offset in enumerate(range(0, len(packed), size)):
+    # the first 5 hex characters are the top 20 bits of the digest
+    prefix = int.from_bytes(packed[offset:offset + 3], 'big') >> 4
+    group = groups.get(prefix)
+    if group is None:
+      group = groups[prefix] = array('l')
+    group.append(index)
+  if _metrics is not None:
+    _metrics.observe('phase_seconds', time.perf_counter() - started, phase='group')
+  return {f'{prefix:05X}': group for prefix, group in groups.items()}
+
+def digest_tail(packed, index, mode='sha1'):
+  # range tail (hex after the 5-char prefix) of the index-th packed digest
+  size = HASH_LENGTHS[mode] // 2
+  offset = index * size
+  return packed[offset + 2:offset + size].hex().upper()[1:]
+
+def pwned_api_check_many(passwords):
+  passwords = list(passwords)
+  counts = [0] * len(passwords)
+  for first5_char, entries in group_by_prefix(passwords).items():
+    if all(definitely_not_breached(first5_char + tail) for _, tail in entries):
+      continue
+    leaks = get_range(first5_char)
+    for index, tail in entries:
+      counts[index] = leaks.get(tail, 0)
+  return counts
 
 def main(args):
   for password in args:
@@ -33,5 +449,23 @@ def main(args):
       print(f'{password} was NOT found. Carry on!')
   return 'done!'
 
+if os.environ.get('PWNED_CACHE_PATH'):
+  enable_disk_cache(os.environ['PWNED_CACHE_PATH'],
+                    float(os.environ.get('PWNED_CACHE_TTL', DEFAULT_TTL)))
+if os.environ.get('PWNED_CORPUS_PATH'):
+  use_offline_corpus(os.environ['PWNED_CORPUS_PATH'])
+if os.environ.get('PWNED_NTLM_CORPUS_PATH'):
+  use_offline_corpus(os.environ['PWNED_NTLM_CORPUS_PATH'], 'ntlm')
+if os.environ.get('PWNED_FILTER_PATH'):
+  use_prefilter(os.environ['PWNED_FILTER_PATH'])
+if os.environ.get('PWNED_MEMORY_CACHE_MB'):
+  enable_memory_cache(int(float(os.environ['PWNED_MEMORY_CACHE_MB']) * 1024 * 1024))
+if os.environ.get('PWNED_METRICS_FILE') or os.environ.get('PWNED_METRICS_PORT'):
+  use_metrics(MetricsRegistry())
+  if os.environ.get('PWNED_METRICS_FILE'):
+    atexit.register(_metrics.write, os.environ['PWNED_METRICS_FILE'])
+  if os.environ.get('PWNED_METRICS_PORT'):
+    _metrics.serve(int(os.environ['PWNED_METRICS_PORT']))
+
 if __name__ == '__main__':
   sys.exit(main(sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+Password Strength
+
+One strength engine shared by the interactive checker, the examples and
+password policies. Each character is classified once through a
+precomputed lookup table instead of one scan per requirement.
+
+A password's result is a bitmask of the checks it passes (LENGTH, LOWER,
+UPPER, DIGIT, SPECIAL); the score is the number of bits set (0-5).
+
+For audits, strength_flags_batch() and strength_flags_buffer() score
+millions of passwords at once with NumPy over a packed byte buffer, and
+compliance_report() summarises the resulting flags.
+
+The batch functions require numpy:
+    pip install numpy
+"""
+
+SPECIAL_CHARACTERS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+DEFAULT_MIN_LENGTH = 8
+
+LENGTH = 1
+LOWER = 2
+UPPER = 4
+DIGIT = 8
+SPECIAL = 16
+ALL_CHECKS = LENGTH | LOWER | UPPER | DIGIT | SPECIAL
+
+# Check order for feedback, with default suggestions
+CHECKS = (
+    (LENGTH, 'length', "Use at least {min_length} characters"),
+    (LOWER, 'lower', "Include lowercase letters"),
+    (UPPER, 'upper', "Include uppercase letters"),
+    (DIGIT, 'digit', "Include numbers"),
+    (SPECIAL, 'special', "Include special characters"),
+)
+
+# Byte value -> character class flag, for ASCII
+CLASS_TABLE = bytes(
+    LOWER if 0x61 <= b <= 0x7a else
+    UPPER if 0x41 <= b <= 0x5a else
+    DIGIT if 0x30 <= b <= 0x39 else
+    SPECIAL if b < 0x80 and chr(b) in SPECIAL_CHARACTERS else 0
+    for b in range(256)
+)
+SCORES = bytes(bin(flags).count('1') for flags in range(ALL_CHECKS + 1))
+
+
+def _unicode_classes(password):
+    # Non-ASCII letters and digits count too, as with str.islower() etc.
+    flags = 0
+    for c in password:
+        if c.islower():
+            flags |= LOWER
+        elif c.isupper():
+            flags |= UPPER
+        elif c.isdigit():
+            flags |= DIGIT
+        elif c in SPECIAL_CHARACTERS:
+            flags |= SPECIAL
+    return flags
+
+
+def character_classes(password):
+    """Return the LOWER/UPPER/DIGIT/SPECIAL flags present in a password"""
+    if not password.isascii():
+        return _unicode_classes(password)
+    flags = 0
+    # translate() classifies every character in one C-level pass
+    for flag in set(password.encode('ascii').translate(CLASS_TABLE)):
+        flags |= flag
+    return flags
+
+
+def strength_flags(password, min_length=DEFAULT_MIN_LENGTH):
+    """Return the bitmask of checks a password passes"""
+    flags = character_classes(password)
+    if len(password) >= min_length:
+        flags |= LENGTH
+    return flags
+
+
+def score(flags):
+    """Number of checks passed (0-5)"""
+    return SCORES[flags]
+
+
+def feedback(flags, min_length=DEFAULT_MIN_LENGTH):
+    """Suggestions for every check missing from flags"""
+    return [message.format(min_length=min_length)
+            for flag, _, message in CHECKS if not flags & flag]
+
+
+def check_password_strength(password, min_length=DEFAULT_MIN_LENGTH):
+    """
+    Basic password strength indicators
+
+    Returns:
+        tuple: (score 0-5, list of suggestions)
+    """
+    flags = strength_flags(password, min_length)
+    return SCORES[flags], feedback(flags, min_length)
+
+
+def _numpy():
+    import numpy
+    return numpy
+
+
+def strength_flags_buffer(buffer, min_length=DEFAULT_MIN_LENGTH):
+    """
+    Score newline-separated passwords packed in one byte buffer
+
+    Each byte is classified through CLASS_TABLE and the flags are OR-reduced
+    per line in a single vectorised pass. Lines containing non-ASCII bytes
+    are decoded (UTF-8, surrogateescape) and scored individually so the
+    result matches strength_flags(). Trailing '\\r' is ignored; empty lines
+    are skipped.
+
+    Args:
+        buffer (bytes-like): Passwords separated by b'\\n' (bytes, mmap, ...)
+        min_length (int): Minimum length for the LENGTH check
+
+    Returns:
+        numpy.ndarray: uint8 flags, one per non-empty line
+    """
+    np = _numpy()
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if not len(data):
+        return np.zeros(0, dtype=np.uint8)
+
+    newlines = np.flatnonzero(data == 0x0a)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(data)]))
+    # Drop a trailing '\r' from CRLF lines
+    crlf = (ends > starts) & (data[np.maximum(ends - 1, 0)] == 0x0d)
+    ends = ends - crlf
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    if not len(starts):
+        return np.zeros(0, dtype=np.uint8)
+
+    table = np.frombuffer(CLASS_TABLE, dtype=np.uint8)
+    classes = table[data]
+    # Separators and '\r' have no class, so reducing over [start, next start)
+    # gives the same flags as reducing over the line itself
+    flags = np.bitwise_or.reduceat(classes, starts)
+    lengths = ends - starts
+    flags |= np.where(lengths >= min_length, LENGTH, 0).astype(np.uint8)
+
+    high = np.flatnonzero(np.bitwise_or.reduceat((data >= 0x80).astype(np.uint8), starts))
+    for row in high:
+        password = bytes(data[starts[row]:ends[row]]).decode('utf-8', 'surrogateescape')
+        flags[row] = strength_flags(password, min_length)
+    return flags
+
+
+def strength_flags_batch(passwords, min_length=DEFAULT_MIN_LENGTH):
+    """
+    Score many passwords at once
+
+    Passwords are packed into one newline-separated buffer and scored with
+    strength_flags_buffer(). Passwords containing newlines or empty ones are
+    scored individually so positions line up with the input.
+
+    Returns:
+        numpy.ndarray: uint8 flags, one per password, in input order
+    """
+    np = _numpy()
+    passwords = list(passwords)
+    flags = np.zeros(len(passwords), dtype=np.uint8)
+    packed, positions = [], []
+    for index, password in enumerate(passwords):
+        if not password or '\n' in password or password.endswith('\r'):
+            flags[index] = strength_flags(password, min_length)
+        else:
+            packed.append(password)
+            positions.append(index)
+    if packed:
+        buffer = '\n'.join(packed).encode('utf-8', 'surrogateescape')
+        flags[positions] = strength_flags_buffer(buffer, min_length)
+    return flags
+
+
+def compliance_report(flags, required=ALL_CHECKS):
+    """
+    Summarise batch flags for a policy compliance report
+
+    Args:
+        flags (numpy.ndarray): Output of strength_flags_batch/_buffer
+        required (int): Bitmask of checks the policy requires
+
+    Returns:
+        dict: total, compliant count, score histogram (0-5) and the number
+        of passwords failing each check
+    """
+    np = _numpy()
+    flags = np.asarray(flags, dtype=np.uint8)
+    scores = np.frombuffer(SCORES, dtype=np.uint8)[flags]
+    return {
+        'total': int(len(flags)),
+        'compliant': int(np.count_nonzero((flags & required) == required)),
+        'scores': {i: int(n) for i, n in enumerate(np.bincount(scores, minlength=6))},
+        'failing': {name: int(np.count_nonzero((flags & flag) == 0))
+                    for flag, name, _ in CHECKS if required & flag},
+    }
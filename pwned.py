@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Pwned
+
+One command-line entry point for the checker, with subcommands. Each
+command imports only what it needs, and the HTTP stack (`requests`) is
+only loaded when a range actually has to be fetched, so checks answered
+from the offline corpus or the disk cache start in a few tens of
+milliseconds, which matters for scripts that run it once per password.
+
+Commands:
+    check    Check passwords (arguments, or one per line on stdin)
+    batch    Batch audit a file (examples/batch_password_checker.py)
+    audit    Offline strength/policy compliance report for a file (numpy)
+    mirror   Download or refresh a local range mirror (mirror_sync.py)
+    serve    Run the breach service daemon (breach_service.py)
+
+Usage:
+    python -m pwned check password123 hunter2
+    printf 'password123\\n' | python -m pwned check --quiet
+    python -m pwned batch passwords.txt results.csv
+    python -m pwned audit passwords.txt --min-length 12
+    python -m pwned mirror mirror.sqlite
+    python -m pwned serve --socket /run/pwned.sock
+
+`check` exits 0 when nothing was found, 1 when any password was found in
+a breach and 2 when a lookup failed. The PWNED_* environment variables
+(disk cache, offline corpus, pre-filter, ...) apply as usual.
+"""
+
+import os
+import sys
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'examples')
+
+EXIT_SAFE = 0
+EXIT_FOUND = 1
+EXIT_ERROR = 2
+
+
+def check(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog='pwned check',
+                                     description="Check passwords against known breaches")
+    parser.add_argument('passwords', nargs='*',
+                        help="Passwords to check (read one per line from stdin if omitted)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="Print only the breach count for each password")
+    args = parser.parse_args(argv)
+
+    passwords = args.passwords
+    if not passwords:
+        stdin = open(sys.stdin.fileno(), encoding='utf-8', errors='surrogateescape', closefd=False)
+        passwords = [line.rstrip('\r\n') for line in stdin if line.rstrip('\r\n')]
+
+    from password_checker import pwned_api_check
+    status = EXIT_SAFE
+    for password in passwords:
+        try:
+            count = pwned_api_check(password)
+        except (RuntimeError, OSError) as e:
+            print(f'{password}: error checking password: {e}', file=sys.stderr)
+            status = EXIT_ERROR
+            continue
+        if args.quiet:
+            print(count)
+        elif count:
+            print(f'{password} was found {count} times... you should probably change your password!')
+        else:
+            print(f'{password} was NOT found. Carry on!')
+        if count and status == EXIT_SAFE:
+            status = EXIT_FOUND
+    return status
+
+
+def batch(argv):
+    sys.path.insert(0, EXAMPLES_DIR)
+    from batch_password_checker import main
+    return main(argv)
+
+
+def audit(argv):
+    import argparse
+    import mmap
+    from password_strength import CHECKS, DEFAULT_MIN_LENGTH
+
+    names = [name for _, name, _ in CHECKS]
+    parser = argparse.ArgumentParser(prog='pwned audit',
+                                     description="Offline strength and policy compliance report")
+    parser.add_argument('input_file', help="Passwords, one per line")
+    parser.add_argument('--min-length', type=int, default=DEFAULT_MIN_LENGTH,
+                        help="Minimum length for the length check")
+    parser.add_argument('--require', nargs='+', choices=names, default=names,
+                        help="Checks the policy requires (default: all)")
+    args = parser.parse_args(argv)
+
+    try:
+        from password_strength import compliance_report, strength_flags_buffer
+        flags_of = {name: flag for flag, name, _ in CHECKS}
+        required = 0
+        for name in args.require:
+            required |= flags_of[name]
+        with open(args.input_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    flags = strength_flags_buffer(buffer, args.min_length)
+            else:
+                flags = strength_flags_buffer(b'', args.min_length)
+        report = compliance_report(flags, required)
+    except ImportError:
+        print("❌ The audit command requires numpy: pip install numpy", file=sys.stderr)
+        return EXIT_ERROR
+    except OSError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    total = report['total']
+    print(f"📊 {total} passwords, {report['compliant']} compliant")
+    for score, count in report['scores'].items():
+        print(f"   score {score}: {count}")
+    for name, count in report['failing'].items():
+        print(f"   failing {name}: {count}")
+    return EXIT_SAFE if report['compliant'] == total else EXIT_FOUND
+
+
+def mirror(argv):
+    from mirror_sync import main
+    return main(argv)
+
+
+def serve(argv):
+    from breach_service import main
+    return main(argv)
+
+
+COMMANDS = {
+    'check': check,
+    'batch': batch,
+    'audit': audit,
+    'mirror': mirror,
+    'serve': serve,
+}
+
+
+def usage():
+    # The module docstring doubles as the help text, without loading argparse
+    return __doc__.strip()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return EXIT_SAFE
+    command = COMMANDS.get(argv[0])
+    if command is None:
+        print(f"pwned: unknown command {argv[0]!r} (choose from {', '.join(COMMANDS)})",
+              file=sys.stderr)
+        return EXIT_ERROR
+    return command(argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Range Cache
+
+Opt-in persistent cache for HaveIBeenPwned range responses, so repeated
+runs over the same passwords are served from disk instead of the API.
+
+Range bodies are stored in a compact binary form: each 35-hex-char hash
+suffix is packed into 18 bytes (with a leading zero nibble), all suffixes
+in sorted order, followed by one big-endian uint32 breach count per
+suffix (NTLM's 27-char suffixes are zero-padded to the same width).
+Entries older than the TTL are revalidated with a
+conditional If-None-Match request, so an unchanged range costs a 304
+instead of a full body.
+
+MemoryRangeCache keeps already-parsed ranges in process memory, bounded
+by a byte budget with LRU eviction, for long-running services.
+"""
+
+import binascii
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+COUNT = struct.Struct('>I')
+SUFFIX_BYTES = 18
+SUFFIX_HEX = 35
+# Bump when the packed layout changes so stale cache files are discarded
+FORMAT_VERSION = 2
+
+
+def pack_range(body):
+    """Pack a 'SUFFIX:COUNT' range body (bytes or str) into the binary layout"""
+    if isinstance(body, str):
+        body = body.encode('ascii')
+    # Splitting on ':' and whitespace in one pass alternates suffix, count
+    tokens = body.replace(b':', b' ').split()
+    suffixes = tokens[0::2]
+    counts = list(map(int, tokens[1::2]))
+
+    # The API already returns suffixes in order, so this check is a
+    # linear pass and the reorder below is normally skipped
+    if suffixes != sorted(suffixes):
+        order = sorted(range(len(suffixes)), key=suffixes.__getitem__)
+        suffixes = [suffixes[i] for i in order]
+        counts = [counts[i] for i in order]
+
+    # NTLM suffixes are shorter; padding them keeps one layout and lookup
+    if suffixes and len(suffixes[0]) != SUFFIX_HEX:
+        suffixes = [suffix.rjust(SUFFIX_HEX, b'0') for suffix in suffixes]
+
+    # Decode every suffix in one call rather than once per line
+    packed = binascii.unhexlify(b'0'.join([b''] + suffixes))
+    counts = array('I', counts)
+    if sys.byteorder == 'little':
+        counts.byteswap()
+    return packed + counts.tobytes()
+
+
+def unpack_range(blob):
+    """Rebuild the 'SUFFIX:COUNT' text body (NTLM suffixes stay zero-padded)"""
+    table = RangeTable(blob)
+    lines = []
+    for i in range(table.records):
+        suffix = blob[i * SUFFIX_BYTES:(i + 1) * SUFFIX_BYTES]
+        count = COUNT.unpack_from(blob, table.counts_offset + i * COUNT.size)[0]
+        lines.append(f"{binascii.hexlify(suffix).decode('ascii').upper()[1:]}:{count}")
+    return '\r\n'.join(lines)
+
+
+class RangeTable:
+    """
+    Parsed range held as one bytes object in the packed binary layout
+
+    Much smaller than a dict of strings, and looked up by binary search
+    over the fixed-width sorted suffixes. Supports .get(tail, default)
+    like a dict.
+    """
+
+    def __init__(self, blob):
+        self.blob = blob
+        self.records = len(blob) // (SUFFIX_BYTES + COUNT.size)
+        self.counts_offset = self.records * SUFFIX_BYTES
+
+    @classmethod
+    def from_content(cls, body):
+        return cls(pack_range(body))
+
+    @property
+    def nbytes(self):
+        return len(self.blob)
+
+    def __len__(self):
+        return self.records
+
+    def get(self, tail, default=0):
+        key = binascii.unhexlify(tail.rjust(SUFFIX_HEX + 1, '0'))
+        blob = self.blob
+        lo, hi = 0, self.records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = mid * SUFFIX_BYTES
+            suffix = blob[offset:offset + SUFFIX_BYTES]
+            if suffix < key:
+                lo = mid + 1
+            elif suffix > key:
+                hi = mid
+            else:
+                return COUNT.unpack_from(blob, self.counts_offset + mid * COUNT.size)[0]
+        return default
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response built from a cached range"""
+
+    status_code = 200
+
+    def __init__(self, blob, etag=None):
+        self.blob = blob
+        self.headers = {'ETag': etag} if etag else {}
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = unpack_range(self.blob)
+        return self._text
+
+    @property
+    def content(self):
+        return self.text.encode('ascii')
+
+
+class CacheEntry:
+    """A cached range body with its ETag and freshness"""
+
+    def __init__(self, blob, etag, fetched_at, ttl):
+        self.blob = blob
+        self.etag = etag
+        self.fetched_at = fetched_at
+        self.fresh = ttl is None or time.time() - fetched_at < ttl
+
+
+class DiskRangeCache:
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        """
+        Open (or create) a SQLite range cache
+
+        Args:
+            path (str): Path to the SQLite cache file
+            ttl (float): Seconds before an entry must be revalidated
+                (None means entries never expire)
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        if self._db.execute('PRAGMA user_version').fetchone()[0] != FORMAT_VERSION:
+            self._db.execute('DROP TABLE IF EXISTS ranges')
+            self._db.execute(f'PRAGMA user_version = {FORMAT_VERSION}')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS ranges ('
+            ' prefix TEXT PRIMARY KEY,'
+            ' body BLOB NOT NULL,'
+            ' etag TEXT,'
+            ' fetched_at REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        self._db.commit()
+
+    def get(self, prefix):
+        """Return the CacheEntry for a prefix, or None if it was never fetched"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, etag, fetched_at FROM ranges WHERE prefix = ?',
+                (prefix,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(row[0], row[1], row[2], self.ttl)
+
+    def put(self, prefix, blob, etag=None):
+        """Store a packed range body"""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO ranges (prefix, body, etag, fetched_at) '
+                'VALUES (?, ?, ?, ?)',
+                (prefix, blob, etag, time.time())
+            )
+            self._db.commit()
+
+    def touch(self, prefix):
+        """Mark an entry fresh again after a 304 Not Modified"""
+        with self._lock:
+            self._db.execute(
+                'UPDATE ranges SET fetched_at = ? WHERE prefix = ?',
+                (time.time(), prefix)
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def estimate_size(leaks):
+    """Approximate memory footprint in bytes of a parsed range"""
+    if isinstance(leaks, RangeTable):
+        return sys.getsizeof(leaks) + sys.getsizeof(leaks.blob)
+    size = sys.getsizeof(leaks)
+    for tail, count in leaks.items():
+        size += sys.getsizeof(tail) + sys.getsizeof(count)
+    return size
+
+
+class MemoryRangeCache:
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BUDGET):
+        """
+        Process-wide LRU cache of parsed ranges
+
+        Args:
+            max_bytes (int): Memory budget; least recently used ranges are
+                evicted once the cached ranges exceed it
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, prefix):
+        """Return the parsed range for a prefix, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(prefix)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(prefix)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, prefix, leaks):
+        size = estimate_size(leaks)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(prefix, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[prefix] = (leaks, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and current memory usage"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,261 @@
+"""
+Ranked Dictionary
+
+Frequency-ranked word lists (common passwords, English words, names...)
+stored as one compact byte trie that is read in place, memory-mapped from
+disk or from an in-memory buffer, instead of being loaded into Python sets.
+
+File layout (little-endian):
+
+    header  magic, version, list count
+    lists   per list: name (16 bytes, NUL padded), word count
+    nodes   per trie node: rank (uint32, 0 = not a word), list index
+            (uint8), child count (uint16), child labels (one byte each,
+            sorted), child offsets (uint32 each)
+
+The root node is last; its offset is the final 4 bytes of the file. Words
+are lowercase UTF-8 and the trie is keyed by byte. A word appearing in
+several lists keeps its best (lowest) rank and that list's index.
+
+Build a dictionary from rank-ordered word lists (most common first):
+    python ranked_dictionary.py words.dict passwords=top-passwords.txt english=english.txt
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+
+MAGIC = b'PWNDICT1'
+VERSION = 1
+HEADER = struct.Struct('<8sHH')
+LIST_ENTRY = struct.Struct('<16sI')
+NODE = struct.Struct('<IBH')
+OFFSET = struct.Struct('<I')
+
+_BYTES = [bytes([i]) for i in range(256)]
+
+# Small built-in lists so estimates are useful without a dictionary file
+DEFAULT_LISTS = {
+    'passwords': (
+        "123456 password 12345678 qwerty 123456789 12345 1234 111111 1234567 dragon "
+        "123123 baseball abc123 football monkey letmein 696969 shadow master 666666 "
+        "qwertyuiop 123321 mustang 1234567890 michael 654321 superman 1qaz2wsx 7777777 "
+        "121212 000000 qazwsx 123qwe killer trustno1 jordan jennifer zxcvbnm asdfgh "
+        "hunter buster soccer harley batman andrew tigger sunshine iloveyou 2000 charlie "
+        "robert thomas hockey ranger daniel starwars klaster 112233 george computer "
+        "michelle jessica pepper 1111 zxcvbn 555555 11111111 131313 freedom 777777 pass "
+        "maggie 159753 aaaaaa ginger princess joshua cheese amanda summer love ashley "
+        "nicole chelsea biteme matthew access yankees 987654321 dallas austin thunder "
+        "taylor matrix admin welcome login passw0rd secret hello"
+    ).split(),
+    'english': (
+        "the of and to in is you that it he was for on are as with his they at be this "
+        "have from or one had by word but not what all were we when your can said there "
+        "use an each which she do how their if will up other about out many then them "
+        "these so some her would make like him into time has look two more write go see "
+        "number no way could people my than first water been call who oil its now find "
+        "long down day did get come made may part love life home house world money "
+        "summer winter spring autumn happy family friend school music dream heart "
+        "angel flower secret freedom dragon monkey tiger sunshine princess football "
+        "baseball soccer hockey master shadow welcome hello letmein"
+    ).split(),
+    'names': (
+        "james john robert michael william david richard joseph thomas charles mary "
+        "patricia jennifer linda elizabeth barbara susan jessica sarah karen daniel "
+        "matthew anthony mark donald steven paul andrew joshua kenneth nancy lisa betty "
+        "margaret sandra ashley kimberly emily donna michelle smith johnson williams "
+        "brown jones garcia miller davis rodriguez martinez"
+    ).split(),
+}
+
+
+class RankedDictionary:
+    def __init__(self, source):
+        """
+        Open a ranked dictionary
+
+        Args:
+            source (str or bytes): Path to a dictionary file (memory-mapped),
+                or the file contents as a bytes-like buffer
+        """
+        self._file = None
+        if isinstance(source, str):
+            self.path = source
+            self._file = open(source, 'rb')
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.path = None
+            self._buffer = source
+        magic, version, count = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{source if self.path else 'buffer'} is not a ranked dictionary")
+        self.lists = []
+        self.sizes = []
+        for i in range(count):
+            name, size = LIST_ENTRY.unpack_from(self._buffer, HEADER.size + i * LIST_ENTRY.size)
+            self.lists.append(name.rstrip(b'\0').decode('utf-8'))
+            self.sizes.append(size)
+        self.root = OFFSET.unpack_from(self._buffer, len(self._buffer) - OFFSET.size)[0]
+
+    def close(self):
+        if self._file is not None:
+            self._buffer.close()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def node(self, offset):
+        """Return (rank, list index) of a node; rank 0 means no word ends here"""
+        rank, list_index, _ = NODE.unpack_from(self._buffer, offset)
+        return rank, list_index
+
+    def child(self, offset, byte):
+        """Return the offset of the child reached by byte, or None"""
+        count = NODE.unpack_from(self._buffer, offset)[2]
+        labels = offset + NODE.size
+        index = self._buffer.find(_BYTES[byte], labels, labels + count)
+        if index < 0:
+            return None
+        return OFFSET.unpack_from(self._buffer, labels + count + (index - labels) * OFFSET.size)[0]
+
+    def step(self, offset, char):
+        """Follow every UTF-8 byte of one character; returns None on a miss"""
+        if char < '\x80':
+            return self.child(offset, ord(char))
+        for byte in char.encode('utf-8', 'surrogateescape'):
+            offset = self.child(offset, byte)
+            if offset is None:
+                return None
+        return offset
+
+    def lookup(self, word):
+        """Return (rank, list name) for a word, or None"""
+        offset = self.root
+        for char in word.lower():
+            offset = self.step(offset, char)
+            if offset is None:
+                return None
+        rank, list_index = self.node(offset)
+        return (rank, self.lists[list_index]) if rank else None
+
+    def prefixes(self, text, start=0):
+        """
+        Yield every dictionary word that starts at text[start]
+
+        Yields:
+            tuple: (end index exclusive, rank, list name)
+        """
+        offset = self.root
+        for end in range(start, len(text)):
+            offset = self.step(offset, text[end])
+            if offset is None:
+                return
+            rank, list_index = self.node(offset)
+            if rank:
+                yield end + 1, rank, self.lists[list_index]
+
+
+def build_dictionary(lists, max_words=None):
+    """
+    Serialise rank-ordered word lists into the dictionary format
+
+    Args:
+        lists (dict): {list name: iterable of words, most common first}
+        max_words (int): Keep at most this many words per list
+
+    Returns:
+        bytes: Dictionary contents, ready to write or pass to RankedDictionary
+    """
+    # In-memory trie: node = [rank, list index, {byte: child}]
+    root = [0, 0, {}]
+    names, sizes = [], []
+    for list_index, (name, words) in enumerate(lists.items()):
+        encoded = name.encode('utf-8')
+        if len(encoded) > LIST_ENTRY.size - OFFSET.size:
+            raise ValueError(f"List name {name!r} is too long")
+        names.append(encoded)
+        rank = 0
+        seen = set()
+        for word in words:
+            word = word.strip().lower()
+            if not word or word in seen:
+                continue  # a duplicate keeps its first (best) rank
+            seen.add(word)
+            node = root
+            for byte in word.encode('utf-8', 'surrogateescape'):
+                node = node[2].setdefault(byte, [0, 0, {}])
+            rank += 1
+            if not node[0] or rank < node[0]:
+                node[0], node[1] = rank, list_index
+            if max_words and rank >= max_words:
+                break
+        sizes.append(rank)
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, len(names)))
+    for name, size in zip(names, sizes):
+        out += LIST_ENTRY.pack(name, size)
+
+    # Children are written before their parent so offsets are known
+    offsets = {}
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node[2].values())
+            continue
+        labels = sorted(node[2])
+        offsets[id(node)] = len(out)
+        out += NODE.pack(node[0], node[1], len(labels))
+        out += bytes(labels)
+        for label in labels:
+            out += OFFSET.pack(offsets.pop(id(node[2][label])))
+    out += OFFSET.pack(offsets[id(root)])
+    return bytes(out)
+
+
+def iter_word_file(path):
+    """Yield the first field of each non-empty, non-comment line"""
+    with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[0].startswith('#'):
+                yield fields[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a ranked dictionary for strength estimation")
+    parser.add_argument('output', help="Dictionary file to write")
+    parser.add_argument('lists', nargs='*', metavar='NAME=FILE',
+                        help="Rank-ordered word list (most common first); "
+                             "the built-in lists are used when none are given")
+    parser.add_argument('--max-words', type=int, help="Keep at most this many words per list")
+    args = parser.parse_args(argv)
+
+    if args.lists:
+        lists = {}
+        for spec in args.lists:
+            name, sep, path = spec.partition('=')
+            if not sep:
+                parser.error(f"expected NAME=FILE, got {spec!r}")
+            lists[name] = iter_word_file(path)
+    else:
+        lists = DEFAULT_LISTS
+
+    data = build_dictionary(lists, args.max_words)
+    with open(args.output, 'wb') as f:
+        f.write(data)
+    dictionary = RankedDictionary(data)
+    summary = ", ".join(f"{name} ({size:,})" for name, size in zip(dictionary.lists, dictionary.sizes))
+    print(f"✅ Wrote {args.output} ({len(data):,} bytes): {summary}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Rate Limiter
+
+Rate control for range requests: a token bucket whose rate adapts to
+upstream feedback, plus retry timing for throttled or failed requests.
+
+The rate grows additively while requests succeed and is halved when the
+API answers 429 or 503 (AIMD), so throughput settles just under the
+highest rate the upstream accepts. A Retry-After header pauses every
+caller sharing the limiter, and retries use exponential backoff with full
+jitter so parallel workers don't retry in lockstep.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+RETRY_STATUSES = (429, 503)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 60.0
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds from a Retry-After header, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    # HTTP-date form; email.utils is slow to import and rarely needed
+    from email.utils import parsedate_to_datetime
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        Thread-safe token bucket
+
+        Args:
+            rate (float): Tokens added per second (None means unlimited)
+            capacity (float): Maximum burst size (defaults to one second of tokens)
+        """
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = self._capacity()
+        self.updated = time.monotonic()
+
+    def _capacity(self):
+        if self.capacity is not None:
+            return self.capacity
+        return max(1.0, self.rate or 1.0)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.tokens = min(self.tokens, self._capacity())
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self._capacity(), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token if one is available; otherwise return seconds to wait"""
+        with self._lock:
+            if self.rate is None:
+                return 0
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=None, max_rate=None, min_rate=0.5, increase=1.0,
+                 max_retries=DEFAULT_MAX_RETRIES, base_backoff=DEFAULT_BASE_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF):
+        """
+        Token bucket that adapts its rate to 429/503 responses
+
+        Args:
+            rate (float): Starting requests per second (None means unlimited
+                until the first throttled response)
+            max_rate (float): Never exceed this many requests per second
+            min_rate (float): Never drop below this many requests per second
+            increase (float): Requests per second added for each second of
+                successful traffic
+            max_retries (int): Retries for a throttled or failed request
+            base_backoff (float): First retry delay in seconds, doubled per attempt
+            max_backoff (float): Cap on a single retry delay, Retry-After included
+        """
+        if rate is not None and max_rate is not None:
+            rate = min(rate, max_rate)
+        self.bucket = TokenBucket(rate)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        # Recent request times, used to pick a rate on the first throttle
+        self._recent = deque(maxlen=100)
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def reserve(self):
+        """Claim a request slot if one is free; otherwise return seconds to wait"""
+        with self._lock:
+            wait = self._paused_until - time.monotonic()
+        if wait > 0:
+            return wait
+        wait = self.bucket.reserve()
+        if not wait:
+            with self._lock:
+                self._recent.append(time.monotonic())
+        return wait
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def _observed_rate(self):
+        if len(self._recent) < 2:
+            return self.min_rate
+        span = self._recent[-1] - self._recent[0]
+        return (len(self._recent) - 1) / span if span > 0 else self.min_rate * 2
+
+    def on_success(self):
+        rate = self.bucket.rate
+        if rate is None:
+            return
+        # +increase/rate per request adds about `increase` req/s per second
+        rate += self.increase / rate
+        if self.max_rate is not None:
+            rate = min(rate, self.max_rate)
+        self.bucket.set_rate(rate)
+
+    def on_throttle(self, attempt, retry_after=None):
+        """
+        Record a throttled or failed request and return how long to wait
+
+        Args:
+            attempt (int): Zero-based retry attempt
+            retry_after (float): Seconds requested by the server, if any;
+                capped at max_backoff like the exponential backoff
+
+        Returns:
+            float: Seconds to wait before retrying
+        """
+        if retry_after is not None:
+            # A Retry-After of an hour would otherwise stall every worker
+            retry_after = min(retry_after, self.max_backoff)
+        with self._lock:
+            self.throttled += 1
+            rate = self.bucket.rate
+            if rate is None:
+                rate = self._observed_rate()
+            rate = max(self.min_rate, rate / 2)
+            if retry_after is not None:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        self.bucket.set_rate(rate)
+
+        if retry_after is not None:
+            return retry_after
+        return self.backoff(attempt)
+
+    def backoff(self, attempt):
+        """Seconds to wait before retry `attempt`, without changing the rate"""
+        # Full jitter keeps parallel workers from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
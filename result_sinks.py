@@ -0,0 +1,306 @@
+"""
+Result Sinks
+
+Incremental writers for batch check results: each result is written as it
+completes, so output is visible while an audit runs and memory stays
+constant however many passwords are checked.
+
+Formats:
+    csv     password,status,breach_count,checked_at
+    jsonl   one JSON object per line
+    binary  compact fixed header + length-prefixed records (see BinarySink)
+
+Writes go through a large buffer, are flushed every flush_interval seconds
+and fsynced every fsync_interval seconds. Output can be compressed with
+gzip or zstd (the 'zstandard' package). sync() ends the current gzip
+member / zstd frame, so the file size it returns is a clean point to
+truncate back to when resuming; concatenated members decompress as one
+stream.
+
+The format and compression are inferred from the file name when not
+given: results.csv, results.jsonl.gz, results.bin.zst, ...
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import struct
+import time
+from datetime import datetime
+
+CSV_FIELDS = ['password', 'status', 'breach_count', 'checked_at']
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.bin': 'binary'}
+COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_FSYNC_INTERVAL = 30.0
+# Check the clock once per this many writes rather than on every one
+CLOCK_CHECK_EVERY = 256
+
+BINARY_MAGIC = b'PWNRES02'
+# status, breach count (-1 if none), checked_at (epoch seconds),
+# password length, error length; the streaming reader accepts lines of any
+# length, so the lengths are 32-bit
+BINARY_RECORD = struct.Struct('<BqdII')
+# Version 1 files, with 16-bit lengths, can still be read
+BINARY_RECORDS = {b'PWNRES01': struct.Struct('<BqdHH'), BINARY_MAGIC: BINARY_RECORD}
+STATUSES = ('SAFE', 'COMPROMISED', 'ERROR')
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def infer_format(path):
+    """Return (format, compression) from a file name such as results.jsonl.gz"""
+    root, ext = os.path.splitext(path)
+    compression = COMPRESSIONS.get(ext.lower())
+    if compression:
+        ext = os.path.splitext(root)[1]
+    return FORMATS.get(ext.lower(), 'csv'), compression
+
+
+class SinkFile:
+    def __init__(self, path, compression=None, append=False, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Buffered, optionally compressed, output file
+
+        Args:
+            path (str): File to write
+            compression (str): None, 'gzip' or 'zstd'
+            append (bool): Append to an existing file instead of replacing it
+            buffer_size (int): Bytes buffered before a write to the file
+        """
+        self.path = path
+        self.compression = compression
+        self._raw = open(path, 'ab' if append else 'wb', buffering=buffer_size)
+        self._zstd = None
+        if compression == 'zstd':
+            import zstandard
+            self._zstd = zstandard
+        elif compression not in (None, 'gzip'):
+            raise ValueError(f"Unknown compression {compression!r}")
+        self._stream = None
+        self._open_stream()
+
+    def _open_stream(self):
+        # A fresh gzip member / zstd frame; compressed streams are
+        # concatenations of these
+        if self.compression == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6)
+        elif self.compression == 'zstd':
+            self._stream = self._zstd.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+
+    def write(self, data):
+        self._stream.write(data)
+
+    def flush(self):
+        """Make everything written so far readable by another process"""
+        if self.compression == 'zstd':
+            self._stream.flush(self._zstd.FLUSH_BLOCK)
+        elif self.compression == 'gzip':
+            self._stream.flush()
+        self._raw.flush()
+
+    def sync(self):
+        """
+        End the current compressed frame, flush and fsync
+
+        Returns:
+            int: File size, a safe point to truncate back to
+        """
+        if self.compression is not None:
+            self._stream.close()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        size = self._raw.tell()
+        if self.compression is not None:
+            self._open_stream()
+        return size
+
+    def close(self):
+        if self._stream is not None and self._stream is not self._raw:
+            self._stream.close()
+        self._stream = None
+        self._raw.close()
+
+
+class ResultSink:
+    """Base class: formats result dicts and writes them to a SinkFile"""
+
+    header = b''
+
+    def __init__(self, path, compression=None, append=False, buffer_size=DEFAULT_BUFFER_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        """
+        Args:
+            path (str): Output file
+            compression (str): None, 'gzip' or 'zstd'
+            append (bool): Continue an existing file (no header is written)
+            buffer_size (int): Write buffer size in bytes
+            flush_interval (float): Seconds between flushes (None: only on sync/close)
+            fsync_interval (float): Seconds between fsyncs (None: only on sync/close)
+        """
+        self.path = path
+        self.file = SinkFile(path, compression, append, buffer_size)
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._last_flush = self._last_fsync = time.monotonic()
+        if not append and self.header:
+            self.file.write(self.header)
+
+    def format(self, result):
+        raise NotImplementedError
+
+    def write(self, result):
+        """Write one result dict"""
+        self.file.write(self.format(result))
+        self.count += 1
+        if self.count % CLOCK_CHECK_EVERY == 0:
+            self._maybe_flush()
+
+    __call__ = write
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        if self.fsync_interval is not None and now - self._last_fsync >= self.fsync_interval:
+            self.sync()
+        elif self.flush_interval is not None and now - self._last_flush >= self.flush_interval:
+            self.file.flush()
+            self._last_flush = now
+
+    def flush(self):
+        self.file.flush()
+        self._last_flush = time.monotonic()
+
+    def sync(self):
+        """Flush and fsync; returns the durable file size"""
+        size = self.file.sync()
+        self._last_flush = self._last_fsync = time.monotonic()
+        return size
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _TextWriter:
+    # Lets csv.writer write straight into a SinkFile
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, text):
+        self.file.write(text.encode('utf-8', 'surrogateescape'))
+
+
+class CSVSink(ResultSink):
+    header = (','.join(CSV_FIELDS) + '\r\n').encode('ascii')
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self._writer = csv.writer(_TextWriter(self.file))
+
+    def write(self, result):
+        # Write the row list directly instead of building a filtered dict
+        breach_count = result['breach_count']
+        self._writer.writerow((result['password'], result['status'],
+                               '' if breach_count is None else breach_count, result['checked_at']))
+        self.count += 1
+        if self.count % CLOCK_CHECK_EVERY == 0:
+            self._maybe_flush()
+
+    __call__ = write
+
+
+class JSONLSink(ResultSink):
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def format(self, result):
+        return (self._encoder.encode(result) + '\n').encode('utf-8', 'surrogateescape')
+
+
+class BinarySink(ResultSink):
+    """
+    Compact binary records
+
+    The file starts with BINARY_MAGIC; each record is BINARY_RECORD
+    (status index into STATUSES, breach count or -1, checked_at as epoch
+    seconds, password length, error length) followed by the password and
+    error as UTF-8 bytes. Read it back with read_binary_results().
+    """
+
+    header = BINARY_MAGIC
+
+    def format(self, result):
+        password = result['password'].encode('utf-8', 'surrogateescape')
+        error = result.get('error', '').encode('utf-8', 'surrogateescape')
+        breach_count = result['breach_count']
+        checked_at = datetime.fromisoformat(result['checked_at']).timestamp()
+        return BINARY_RECORD.pack(STATUS_CODES[result['status']],
+                                  -1 if breach_count is None else breach_count,
+                                  checked_at, len(password), len(error)) + password + error
+
+
+SINKS = {'csv': CSVSink, 'jsonl': JSONLSink, 'binary': BinarySink}
+
+
+def open_sink(path, format=None, compression=None, **kwargs):
+    """
+    Open a result sink, inferring format/compression from the file name
+
+    Args:
+        path (str): Output file
+        format (str): 'csv', 'jsonl' or 'binary'
+        compression (str): None, 'gzip' or 'zstd'
+        **kwargs: Passed to ResultSink (append, buffer_size, flush_interval,
+            fsync_interval)
+    """
+    inferred_format, inferred_compression = infer_format(path)
+    sink_class = SINKS.get(format or inferred_format)
+    if sink_class is None:
+        raise ValueError(f"Unknown result format {format!r}")
+    return sink_class(path, compression=compression or inferred_compression, **kwargs)
+
+
+def _open_compressed(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True,
+                                                          closefd=True)
+    return open(path, 'rb')
+
+
+def read_binary_results(path, compression=None):
+    """Yield result dicts from a file written by BinarySink"""
+    compression = compression or infer_format(path)[1]
+    with _open_compressed(path, compression) as f:
+        f = io.BufferedReader(f) if compression == 'zstd' else f
+        record = BINARY_RECORDS.get(f.read(len(BINARY_MAGIC)))
+        if record is None:
+            raise ValueError(f"{path} is not a binary results file")
+        while True:
+            head = f.read(record.size)
+            if len(head) < record.size:
+                return
+            status, breach_count, checked_at, password_length, error_length = record.unpack(head)
+            password = f.read(password_length).decode('utf-8', 'surrogateescape')
+            result = {
+                'password': password,
+                'status': STATUSES[status],
+                'breach_count': None if breach_count < 0 else breach_count,
+                'checked_at': datetime.fromtimestamp(checked_at).isoformat(),
+            }
+            if error_length:
+                result['error'] = f.read(error_length).decode('utf-8', 'surrogateescape')
+            yield result
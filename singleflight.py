@@ -0,0 +1,133 @@
+"""
+Singleflight
+
+Coalesces concurrent calls for the same key into one: the first caller
+runs the call, and callers arriving while it is still in flight wait for
+it and share its result or exception. Nothing is cached afterwards; once
+the call returns, the next caller for the key starts a new one.
+
+password_checker uses this for range fetches, so a burst of checks for
+passwords sharing a hash prefix (a credential-stuffing wave, a grouped
+batch audit) costs one upstream request per distinct prefix.
+
+Singleflight is for threads, AsyncSingleflight for coroutines on one
+event loop.
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Singleflight:
+    def __init__(self, on_coalesce=None):
+        """
+        Thread-safe call coalescing
+
+        Args:
+            on_coalesce (callable): Called with the key whenever a caller
+                joins a call already in flight
+        """
+        self.on_coalesce = on_coalesce
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def do(self, key, fn, *args):
+        """Return fn(*args), sharing the call with concurrent callers for key"""
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            if self.on_coalesce is not None:
+                self.on_coalesce(key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._in_flight)
+
+
+class _Flight:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleflight:
+    def __init__(self, on_coalesce=None):
+        """
+        Call coalescing for coroutines on one event loop
+
+        The shared call runs as its own task, so cancelling one caller
+        doesn't cancel it for the others; it is only cancelled once every
+        caller waiting on it has been.
+
+        Args:
+            on_coalesce (callable): Called with the key whenever a caller
+                joins a call already in flight
+        """
+        self.on_coalesce = on_coalesce
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+
+    async def do(self, key, fn, *args):
+        """Return await fn(*args), sharing the call with concurrent callers for key"""
+        # Imported here so thread-only users don't pay for asyncio at startup
+        import asyncio
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = self._in_flight[key] = _Flight(asyncio.ensure_future(fn(*args)))
+            flight.task.add_done_callback(lambda task: self._finished(key, flight))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+            if self.on_coalesce is not None:
+                self.on_coalesce(key)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Everyone waiting was cancelled
+                flight.task.cancel()
+
+    def _finished(self, key, flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.task.cancelled():
+            # Mark the exception retrieved even if every waiter was cancelled
+            flight.task.exception()
+
+    def in_flight(self):
+        return len(self._in_flight)
@@ -0,0 +1,589 @@
+"""
+Strength Estimator
+
+zxcvbn-style password strength estimation: instead of counting character
+classes, it finds the patterns an attacker would try first and estimates
+how many guesses the password would take.
+
+Detected patterns:
+    dictionary  ranked common passwords, words and names, also reversed,
+                capitalised or with l33t substitutions ("P@ssw0rd")
+    spatial     keyboard walks on QWERTY and the numeric keypad ("qwerty", "zxcvb")
+    sequence    runs like "abcd", "9876" or "aceg"
+    repeat      repeated characters or blocks ("aaaa", "abcabc")
+    year        recent years ("1987", "2024")
+
+The password is covered with the sequence of matches (and brute-forced
+gaps) that needs the fewest total guesses; that total gives a 0-4 score
+and crack time estimates.
+
+Dictionaries come from ranked_dictionary: the small built-in lists by
+default, or a larger memory-mapped file set with use_dictionary() or
+PWNED_DICTIONARY_PATH.
+"""
+
+import math
+import os
+import re
+import sys
+from datetime import date
+
+from ranked_dictionary import DEFAULT_LISTS, RankedDictionary, build_dictionary
+
+# Only this many leading characters are matched; the rest is scored as
+# brute force. Matching and the DP grow quadratically with the length, and
+# this keeps an estimate under a millisecond.
+MAX_LENGTH = 20
+# Guesses are capped to stay within the float range (crack times, JSON)
+MAX_GUESSES = int(sys.float_info.max)
+MAX_GUESSES_LOG10 = math.log10(MAX_GUESSES)
+BRUTEFORCE_CARDINALITY = 10
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+MIN_YEAR_SPACE = 20
+REFERENCE_YEAR = date.today().year
+
+# Guesses per second for each attack scenario
+CRACK_SPEEDS = {
+    'online_throttled': 100 / 3600,
+    'online_unthrottled': 10,
+    'offline_slow_hashing': 1e4,
+    'offline_fast_hashing': 1e10,
+}
+
+L33T_TABLE = {
+    'a': '4@', 'b': '8', 'c': '({[<', 'e': '3', 'g': '69', 'i': '1!|',
+    'l': '1|7', 'o': '0', 's': '$5', 't': '+7', 'x': '%', 'z': '2',
+}
+# Substituted character -> letters it may stand for
+L33T_LETTERS = {}
+for _letter, _subs in L33T_TABLE.items():
+    for _sub in _subs:
+        L33T_LETTERS[_sub] = L33T_LETTERS.get(_sub, '') + _letter
+
+KEYBOARDS = {
+    # Each key lists its unshifted and shifted character; rows are slanted
+    'qwerty': (('`~', '1!', '2@', '3#', '4$', '5%', '6^', '7&', '8*', '9(', '0)', '-_', '=+'),
+               ('qQ', 'wW', 'eE', 'rR', 'tT', 'yY', 'uU', 'iI', 'oO', 'pP', '[{', ']}', '\\|'),
+               ('aA', 'sS', 'dD', 'fF', 'gG', 'hH', 'jJ', 'kK', 'lL', ';:', "'\""),
+               ('zZ', 'xX', 'cC', 'vV', 'bB', 'nN', 'mM', ',<', '.>', '/?')),
+    # Numeric keypad, aligned grid (None marks a gap)
+    'keypad': ((None, '/', '*', '-'),
+               ('7', '8', '9', '+'),
+               ('4', '5', '6', None),
+               ('1', '2', '3', None),
+               (None, '0', '.', None)),
+}
+SLANTED_NEIGHBOURS = ((-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1))
+ALIGNED_NEIGHBOURS = ((-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1))
+
+WARNINGS = {
+    'top10': "This is a top-10 common password",
+    'top100': "This is a top-100 common password",
+    'common': "This is a very common password",
+    'similar': "This is similar to a commonly used password",
+    'word': "A word by itself is easy to guess",
+    'name': "Names and surnames by themselves are easy to guess",
+    'spatial_row': "Straight rows of keys are easy to guess",
+    'spatial': "Short keyboard patterns are easy to guess",
+    'repeat': 'Repeats like "abcabc" are only slightly harder to guess than "abc"',
+    'sequence': "Sequences like abc or 6543 are easy to guess",
+    'year': "Recent years are easy to guess",
+}
+
+
+def _build_graph(rows, slanted):
+    """Map each character to (keyboard position, shifted) and list key adjacency"""
+    positions = {}
+    for y, row in enumerate(rows):
+        for x, key in enumerate(row):
+            if key is None:
+                continue
+            # Slanted rows are offset by half a key per row; doubling x keeps integers
+            position = (2 * x + y, y) if slanted else (x, y)
+            for shifted, char in enumerate(key):
+                positions[char] = (position, bool(shifted))
+    offsets = SLANTED_NEIGHBOURS if slanted else ALIGNED_NEIGHBOURS
+    if slanted:
+        offsets = tuple((2 * dx + dy, dy) for dx, dy in offsets)
+    keys = {position for position, _ in positions.values()}
+    degrees = [sum((x + dx, y + dy) in keys for dx, dy in offsets) for x, y in keys]
+    return {
+        'positions': positions,
+        'directions': {offset: index for index, offset in enumerate(offsets)},
+        'starts': len(keys),
+        'average_degree': sum(degrees) / len(degrees),
+    }
+
+
+GRAPHS = {name: _build_graph(rows, slanted=name == 'qwerty') for name, rows in KEYBOARDS.items()}
+
+_dictionary = None
+
+
+def use_dictionary(path):
+    """Load ranked dictionaries from a file; pass None to go back to the built-in lists"""
+    global _dictionary
+    if _dictionary is not None:
+        _dictionary.close()
+    _dictionary = RankedDictionary(path) if path else None
+    return _dictionary
+
+
+def current_dictionary():
+    global _dictionary
+    if _dictionary is None:
+        _dictionary = RankedDictionary(build_dictionary(DEFAULT_LISTS))
+    return _dictionary
+
+
+def _choose(n, k):
+    return math.comb(n, k) if 0 <= k <= n else 0
+
+
+def uppercase_variations(token):
+    if token.islower() or not any(c.isalpha() for c in token):
+        return 1
+    # Common capitalisations: First, lasT, ALL
+    if token[0].isupper() and token[1:].islower() or token.isupper() \
+            or token[-1].isupper() and token[:-1].islower():
+        return 2
+    upper = sum(1 for c in token if c.isupper())
+    lower = sum(1 for c in token if c.islower())
+    return sum(_choose(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+def l33t_variations(match):
+    variations = 1
+    token = match['token'].lower()
+    for sub, letter in match['sub'].items():
+        subbed = token.count(sub)
+        unsubbed = token.count(letter)
+        if subbed == 0 or unsubbed == 0:
+            variations *= 2
+        else:
+            variations *= sum(_choose(subbed + unsubbed, i)
+                              for i in range(1, min(subbed, unsubbed) + 1))
+    return variations
+
+
+# -- matchers --------------------------------------------------------------
+
+def dictionary_matches(password, dictionary, user_inputs=()):
+    """Dictionary words, including l33t spellings, starting at every position"""
+    lowered = password.lower()
+    if len(lowered) != len(password):
+        # Keep indexes aligned when lowercasing changes the length ("İ")
+        lowered = ''.join(c.lower() if len(c.lower()) == 1 else c for c in password)
+    matches = []
+    root = dictionary.root
+    for start in range(len(lowered)):
+        # Depth-first over the trie; l33t characters branch into the letters
+        # they may stand for
+        stack = [(root, start, None)]
+        while stack:
+            offset, end, sub = stack.pop()
+            if end > start:
+                rank, list_index = dictionary.node(offset)
+                if rank:
+                    matches.append({
+                        'pattern': 'dictionary', 'i': start, 'j': end - 1,
+                        'token': password[start:end], 'rank': rank,
+                        'dictionary': dictionary.lists[list_index],
+                        'sub': dict(sub) if sub else {}, 'reversed': False,
+                    })
+            if end == len(lowered):
+                continue
+            char = lowered[end]
+            nxt = dictionary.step(offset, char)
+            if nxt is not None:
+                stack.append((nxt, end + 1, sub))
+            for letter in L33T_LETTERS.get(char, ''):
+                # One character is read one way throughout a word
+                if sub and (sub.get(char, letter) != letter):
+                    continue
+                nxt = dictionary.step(offset, letter)
+                if nxt is not None:
+                    stack.append((nxt, end + 1, {**(sub or {}), char: letter}))
+
+    # Reversed words ("drowssap") without l33t
+    reversed_lowered = lowered[::-1]
+    n = len(lowered)
+    for start in range(n):
+        for end, rank, name in dictionary.prefixes(reversed_lowered, start):
+            if end - start < 2:
+                continue
+            i, j = n - end, n - 1 - start
+            token = password[i:j + 1]
+            if token.lower() == token.lower()[::-1]:
+                continue  # palindromes are already matched forwards
+            matches.append({
+                'pattern': 'dictionary', 'i': i, 'j': j, 'token': token, 'rank': rank,
+                'dictionary': name, 'sub': {}, 'reversed': True,
+            })
+
+    for rank, word in enumerate((w.lower() for w in user_inputs if w), 1):
+        start = lowered.find(word)
+        while start >= 0:
+            matches.append({
+                'pattern': 'dictionary', 'i': start, 'j': start + len(word) - 1,
+                'token': password[start:start + len(word)], 'rank': rank,
+                'dictionary': 'user_inputs', 'sub': {}, 'reversed': False,
+            })
+            start = lowered.find(word, start + 1)
+    return matches
+
+
+def spatial_matches(password):
+    matches = []
+    for name, graph in GRAPHS.items():
+        positions = graph['positions']
+        directions = graph['directions']
+        i = 0
+        while i < len(password) - 2:
+            j = i
+            turns, shifted, last_direction = 0, 0, None
+            if password[i] in positions and positions[password[i]][1]:
+                shifted += 1
+            while j + 1 < len(password):
+                current = positions.get(password[j])
+                following = positions.get(password[j + 1])
+                if current is None or following is None:
+                    break
+                (x1, y1), _ = current
+                (x2, y2), is_shifted = following
+                direction = directions.get((x2 - x1, y2 - y1))
+                if direction is None:
+                    break
+                if direction != last_direction:
+                    turns += 1
+                    last_direction = direction
+                shifted += is_shifted
+                j += 1
+            if j - i >= 2:
+                matches.append({
+                    'pattern': 'spatial', 'i': i, 'j': j, 'token': password[i:j + 1],
+                    'graph': name, 'turns': turns, 'shifted_count': shifted,
+                })
+                i = j
+            else:
+                i += 1
+    return matches
+
+
+def sequence_matches(password):
+    matches = []
+    i = 0
+    n = len(password)
+    while i < n - 2:
+        delta = ord(password[i + 1]) - ord(password[i])
+        j = i + 1
+        while j + 1 < n and ord(password[j + 1]) - ord(password[j]) == delta:
+            j += 1
+        if j - i >= 2 and 0 < abs(delta) <= 5:
+            matches.append({
+                'pattern': 'sequence', 'i': i, 'j': j, 'token': password[i:j + 1],
+                'ascending': delta > 0,
+            })
+            i = j
+        else:
+            i += 1
+    return matches
+
+
+_GREEDY_REPEAT = re.compile(r'(.+)\1+', re.DOTALL)
+_LAZY_REPEAT = re.compile(r'(.+?)\1+', re.DOTALL)
+_LAZY_ANCHORED = re.compile(r'^(.+?)\1+$', re.DOTALL)
+
+
+def repeat_matches(password, dictionary, user_inputs):
+    matches = []
+    start = 0
+    while start < len(password):
+        greedy = _GREEDY_REPEAT.search(password, start)
+        if not greedy:
+            break
+        lazy = _LAZY_REPEAT.search(password, start)
+        if len(greedy.group(0)) > len(lazy.group(0)):
+            # "aabaab": the greedy match spans more; its smallest unit is the base
+            match = greedy
+            base = _LAZY_ANCHORED.match(match.group(0)).group(1)
+        else:
+            match = lazy
+            base = match.group(1)
+        i, j = match.span()
+        matches.append({
+            'pattern': 'repeat', 'i': i, 'j': j - 1, 'token': match.group(0),
+            'base_token': base, 'repeat_count': len(match.group(0)) // len(base),
+            'base_guesses': _estimate(base, dictionary, user_inputs)['guesses'],
+        })
+        start = j
+    return matches
+
+
+_YEAR = re.compile(r'19\d\d|20\d\d')
+
+
+def year_matches(password):
+    return [{'pattern': 'year', 'i': m.start(), 'j': m.end() - 1, 'token': m.group(0)}
+            for m in _YEAR.finditer(password)]
+
+
+# -- guess estimation ------------------------------------------------------
+
+def spatial_guesses(match):
+    graph = GRAPHS[match['graph']]
+    starts, degree = graph['starts'], graph['average_degree']
+    length, turns = len(match['token']), match['turns']
+    guesses = 0
+    for i in range(2, length + 1):
+        for j in range(1, min(turns, i - 1) + 1):
+            guesses += _choose(i - 1, j - 1) * starts * degree ** j
+    shifted = match['shifted_count']
+    if shifted:
+        unshifted = length - shifted
+        if unshifted == 0:
+            guesses *= 2
+        else:
+            guesses *= sum(_choose(shifted + unshifted, i)
+                           for i in range(1, min(shifted, unshifted) + 1))
+    return guesses
+
+
+def match_guesses(match, password_length):
+    if 'guesses' in match:
+        return match['guesses']
+    pattern = match['pattern']
+    token = match['token']
+    if pattern == 'bruteforce':
+        guesses = BRUTEFORCE_CARDINALITY ** len(token)
+        min_guesses = (MIN_SUBMATCH_GUESSES_SINGLE_CHAR if len(token) == 1
+                       else MIN_SUBMATCH_GUESSES_MULTI_CHAR) + 1
+    else:
+        if pattern == 'dictionary':
+            guesses = match['rank'] * uppercase_variations(token)
+            if match['sub']:
+                guesses *= l33t_variations(match)
+            if match['reversed']:
+                guesses *= 2
+        elif pattern == 'spatial':
+            guesses = spatial_guesses(match)
+        elif pattern == 'sequence':
+            first = token[0]
+            base = 4 if first in 'aAzZ019' else 10 if first.isdigit() else 26
+            guesses = base * len(token) * (1 if match['ascending'] else 2)
+        elif pattern == 'repeat':
+            guesses = match['base_guesses'] * match['repeat_count']
+        elif pattern == 'year':
+            guesses = max(abs(int(token) - REFERENCE_YEAR), MIN_YEAR_SPACE)
+        else:
+            raise ValueError(f"Unknown pattern {pattern!r}")
+        min_guesses = 1
+        if len(token) < password_length:
+            min_guesses = (MIN_SUBMATCH_GUESSES_SINGLE_CHAR if len(token) == 1
+                           else MIN_SUBMATCH_GUESSES_MULTI_CHAR)
+    match['guesses'] = max(guesses, min_guesses)
+    return match['guesses']
+
+
+def most_guessable_sequence(password, matches):
+    """
+    Cover the password with the match sequence needing the fewest guesses
+
+    A sequence of l matches costs l! * product(guesses) plus
+    MIN_GUESSES_BEFORE_GROWING_SEQUENCE ** (l - 1), which penalises
+    splitting a password into many small pieces.
+
+    Returns:
+        tuple: (total guesses, list of matches)
+    """
+    n = len(password)
+    by_end = [[] for _ in range(n)]
+    for match in matches:
+        by_end[match['j']].append(match)
+    factorials = [math.factorial(length) for length in range(n + 2)]
+    # Guesses for a brute-force run of each size
+    bruteforce = [0] + [max(BRUTEFORCE_CARDINALITY ** size, (MIN_SUBMATCH_GUESSES_SINGLE_CHAR
+                            if size == 1 else MIN_SUBMATCH_GUESSES_MULTI_CHAR) + 1)
+                        for size in range(1, n + 1)]
+    # Per end position k: {sequence length: (total, product, start, match)};
+    # brute-force runs are stored with match None and only built on unwind
+    optimal = [{} for _ in range(n)]
+
+    def update(i, k, guesses, length, match):
+        product = guesses
+        if length > 1:
+            product *= optimal[i - 1][length - 1][1]
+        total = factorials[length] * product + MIN_GUESSES_BEFORE_GROWING_SEQUENCE ** (length - 1)
+        candidates = optimal[k]
+        for other_length in candidates:
+            if other_length <= length and candidates[other_length][0] <= total:
+                return
+        candidates[length] = (total, product, i, match)
+
+    for k in range(n):
+        for match in by_end[k]:
+            i = match['i']
+            guesses = match_guesses(match, n)
+            if i > 0:
+                for length in list(optimal[i - 1]):
+                    update(i, k, guesses, length + 1, match)
+            else:
+                update(i, k, guesses, 1, match)
+        for i in range(k + 1):
+            guesses = bruteforce[k + 1 - i]
+            if i == 0:
+                update(i, k, guesses, 1, None)
+                continue
+            for length, (_, _, _, last) in list(optimal[i - 1].items()):
+                # Adjacent brute-force runs are always better merged
+                if last is not None:
+                    update(i, k, guesses, length + 1, None)
+
+    if not n:
+        return 1, []
+    length = min(optimal[n - 1], key=lambda candidate: optimal[n - 1][candidate][0])
+    total = optimal[n - 1][length][0]
+    sequence = []
+    k = n - 1
+    while k >= 0:
+        _, _, i, match = optimal[k][length]
+        if match is None:
+            token = password[i:k + 1]
+            match = {'pattern': 'bruteforce', 'i': i, 'j': k, 'token': token}
+            match_guesses(match, n)
+        sequence.insert(0, match)
+        k = i - 1
+        length -= 1
+    return total, sequence
+
+
+def _estimate(password, dictionary, user_inputs):
+    matches = dictionary_matches(password, dictionary, user_inputs)
+    matches += spatial_matches(password)
+    matches += sequence_matches(password)
+    matches += year_matches(password)
+    matches += repeat_matches(password, dictionary, user_inputs)
+    guesses, sequence = most_guessable_sequence(password, matches)
+    return {'guesses': guesses, 'sequence': sequence}
+
+
+# -- results ---------------------------------------------------------------
+
+def guesses_to_score(guesses):
+    delta = 5
+    if guesses < 1e3 + delta:
+        return 0
+    if guesses < 1e6 + delta:
+        return 1
+    if guesses < 1e8 + delta:
+        return 2
+    if guesses < 1e10 + delta:
+        return 3
+    return 4
+
+
+def display_time(seconds):
+    """Human-readable duration, e.g. "3 hours" or "centuries\""""
+    units = (('second', 60), ('minute', 60), ('hour', 24), ('day', 31),
+             ('month', 12), ('year', 100))
+    if seconds < 1:
+        return "less than a second"
+    value = seconds
+    for unit, size in units:
+        if value < size:
+            value = round(value)
+            return f"{value} {unit}{'s' if value != 1 else ''}"
+        value /= size
+    return "centuries"
+
+
+def _feedback(score, sequence):
+    if not sequence:
+        return None, ["Use a few words, avoid common phrases",
+                      "No need for symbols, digits, or uppercase letters"]
+    if score > 2:
+        return None, []
+    longest = max(sequence, key=lambda m: len(m['token']))
+    warning = None
+    suggestions = ["Add another word or two. Uncommon words are better."]
+    pattern = longest['pattern']
+    if pattern == 'dictionary':
+        sole = len(sequence) == 1
+        if longest['dictionary'] == 'passwords':
+            if sole and not longest['sub'] and not longest['reversed']:
+                rank = longest['rank']
+                warning = WARNINGS['top10' if rank <= 10 else 'top100' if rank <= 100 else 'common']
+            else:
+                warning = WARNINGS['similar']
+        elif longest['dictionary'] == 'names':
+            warning = WARNINGS['name'] if sole else None
+        elif sole:
+            warning = WARNINGS['word']
+        token = longest['token']
+        if token[:1].isupper():
+            suggestions.append("Capitalization doesn't help very much")
+        elif token.isupper() and token.lower() != token:
+            suggestions.append("All-uppercase is almost as easy to guess as all-lowercase")
+        if longest['reversed'] and len(token) >= 4:
+            suggestions.append("Reversed words aren't much harder to guess")
+        if longest['sub']:
+            suggestions.append("Predictable substitutions like '@' instead of 'a' don't help very much")
+    elif pattern == 'spatial':
+        warning = WARNINGS['spatial_row' if longest['turns'] == 1 else 'spatial']
+        suggestions.append("Use a longer keyboard pattern with more turns")
+    elif pattern == 'repeat':
+        warning = WARNINGS['repeat']
+        suggestions.append("Avoid repeated words and characters")
+    elif pattern == 'sequence':
+        warning = WARNINGS['sequence']
+        suggestions.append("Avoid sequences")
+    elif pattern == 'year':
+        warning = WARNINGS['year']
+        suggestions.append("Avoid recent years and years associated with you")
+    return warning, suggestions
+
+
+def estimate_strength(password, user_inputs=()):
+    """
+    Estimate how many guesses a password would take to crack
+
+    Args:
+        password (str): Password to analyse
+        user_inputs (iterable): Words tied to the user (name, email, site)
+            that should count as easy to guess
+
+    Returns:
+        dict: guesses, guesses_log10, score (0-4), crack_times_seconds and
+        crack_times_display per attack scenario, warning, suggestions and
+        the matched sequence
+    """
+    analysed = password[:MAX_LENGTH]
+    result = _estimate(analysed, current_dictionary(), tuple(user_inputs))
+    # Anything past MAX_LENGTH is treated as brute force; the total is
+    # worked out in log10 space, as it can be far beyond the float range
+    extra = max(0, len(password) - MAX_LENGTH)
+    guesses_log10 = math.log10(result['guesses']) + extra * math.log10(BRUTEFORCE_CARDINALITY)
+    if guesses_log10 < MAX_GUESSES_LOG10:
+        guesses = result['guesses'] * BRUTEFORCE_CARDINALITY ** extra
+    else:
+        guesses = MAX_GUESSES
+    score = guesses_to_score(guesses)
+    crack_times = {name: min(guesses / speed, sys.float_info.max)
+                   for name, speed in CRACK_SPEEDS.items()}
+    warning, suggestions = _feedback(score, result['sequence'])
+    return {
+        'guesses': guesses,
+        'guesses_log10': guesses_log10,
+        'score': score,
+        'crack_times_seconds': crack_times,
+        'crack_times_display': {name: display_time(s) for name, s in crack_times.items()},
+        'warning': warning,
+        'suggestions': suggestions,
+        'sequence': [{k: v for k, v in m.items() if k != 'base_guesses'} for m in result['sequence']],
+    }
+
+
+if os.environ.get('PWNED_DICTIONARY_PATH'):
+    use_dictionary(os.environ['PWNED_DICTIONARY_PATH'])